@@ -1,7 +1,7 @@
 import functools
-from typing import Any, Callable
+from typing import Any, Callable, Generic
 
-from ryz.core import panic
+from ryz.core import Err, Ok, Res, ecode, panic
 from ryz.types import TClass
 
 
@@ -10,6 +10,121 @@ class Static:
         raise NotImplementedError
 
 
+class SubclassIndexed:
+    """
+    Mixin for bases of class hierarchies indexed by ``SubclassIndex``.
+
+    Each definition of a subclass increments the generation, which makes
+    all subclass indexes rebuild on next lookup.
+    """
+    subclass_gen: int = 0
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        SubclassIndexed.subclass_gen += 1
+
+
+class SubclassIndex(Generic[TClass]):
+    """
+    Index of subclasses of a base class, by name and by their bases.
+
+    Built lazily on first lookup. If the base inherits ``SubclassIndexed``,
+    the index is rebuilt once a new subclass is defined, otherwise it must
+    be rebuilt by ``invalidate``.
+
+    Subclasses are ordered as they are found by a depth-first walk of
+    ``__subclasses__()``, each class taken once.
+    """
+    def __init__(self, Base: TClass) -> None:
+        self.Base = Base
+        self._gen: int | None = None
+        self._all: list[TClass] = []
+        self._by_name: dict[str, list[TClass]] = {}
+        self._descendants: dict[type, list[TClass]] = {}
+
+    def invalidate(self):
+        self._gen = None
+
+    def get_all(self) -> list[TClass]:
+        """
+        Gets all subclasses of the base.
+        """
+        self._ensure_built()
+        return self._all
+
+    def get_descendants(self, C: type) -> list[TClass]:
+        """
+        Gets all subclasses of a class from the index.
+        """
+        self._ensure_built()
+        return self._descendants.get(C, [])
+
+    def get_all_by_name(self, name: str) -> list[TClass]:
+        """
+        Gets the base or its subclasses with the name.
+        """
+        self._ensure_built()
+        return self._by_name.get(name, [])
+
+    def get_by_name(self, name: str) -> Res[TClass]:
+        """
+        Gets the base or its subclass with the name.
+
+        Returns ``ecode.Val`` err if there are several such classes.
+        """
+        Classes = self.get_all_by_name(name)
+        if not Classes:
+            return Err(
+                f"class of supertype {self.Base} with name {name}",
+                ecode.NotFound,
+            )
+        if len(Classes) > 1:
+            return Err(
+                f"name {name} is ambiguous between classes {Classes}",
+                ecode.Val,
+            )
+        return Ok(Classes[0])
+
+    def get_ambiguous_names(self) -> list[str]:
+        self._ensure_built()
+        return [k for k, v in self._by_name.items() if len(v) > 1]
+
+    def _ensure_built(self):
+        gen = SubclassIndexed.subclass_gen
+        if self._gen is not None and (
+            self._gen == gen or not issubclass(self.Base, SubclassIndexed)
+        ):
+            return
+
+        self._all = []
+        self._by_name = {self.Base.__name__: [self.Base]}
+        self._descendants = {self.Base: self._all}
+        seen: set[type] = set()
+        stack: list[type] = list(reversed(self.Base.__subclasses__()))
+        while stack:
+            C = stack.pop()
+            if C in seen:
+                continue
+            seen.add(C)
+            self._all.append(C)  # type: ignore
+            self._by_name.setdefault(C.__name__, []).append(C)  # type: ignore
+            self._descendants.setdefault(C, [])  # type: ignore
+            # with multiple inheritance, an ancestor could be out of the path
+            # the class is reached by
+            ancestors = [
+                A for A in C.__mro__[1:]
+                if A is not self.Base and issubclass(A, self.Base)
+            ]
+            for Ancestor in ancestors:
+                self._descendants.setdefault(Ancestor, [])  # type: ignore
+                self._descendants[Ancestor].append(C)  # type: ignore
+            stack.extend(reversed(C.__subclasses__()))
+        self._gen = gen
+
+
+_indexes: dict[type, SubclassIndex] = {}
+
+
 class ClassUtils(Static):
     @classmethod
     def find_all_subclasses(
@@ -19,7 +134,13 @@ class ClassUtils(Static):
         """
         Recursively searches for all subclasses of the base class and returns
         it.
+
+        For bases inheriting ``SubclassIndexed``, uses a cached index, and
+        returns each subclass once.
         """
+        if issubclass(Base, SubclassIndexed):
+            return list(cls.get_subclass_index(Base).get_all())
+
         Classes: list[TClass] = []
 
         cls._traverse_for_subclasses(Base, Classes)
@@ -53,6 +174,12 @@ class ClassUtils(Static):
         if BaseClass.__name__ == name:
             return BaseClass
 
+        if issubclass(BaseClass, SubclassIndexed):
+            Classes = cls.get_subclass_index(BaseClass).get_all_by_name(name)
+            if not Classes:
+                panic(f"class of supertype {BaseClass} with name {name}")
+            return Classes[0]
+
         out: TClass | None = cls._traverse_subclasses_checking_name(
             name, BaseClass,
         )
@@ -63,6 +190,15 @@ class ClassUtils(Static):
         else:
             return out
 
+    @classmethod
+    def get_subclass_index(cls, Base: TClass) -> SubclassIndex[TClass]:
+        """
+        Gets a shared subclass index of the base, creating it if necessary.
+        """
+        if Base not in _indexes:
+            _indexes[Base] = SubclassIndex(Base)
+        return _indexes[Base]
+
     @classmethod
     def bind_first_arg(cls, arg: Any):
         """Adds first argument to wrapped function call.
@@ -20,8 +20,9 @@ from typing import (
 from pydantic import BaseModel
 
 from ryz import log, traceback
-from ryz.lock import Lock
+from ryz.lock import RWLock
 from ryz.obj import get_fqname
+from ryz.traceback import FrameRecord
 
 __all__ = [
     "Ok",
@@ -32,6 +33,8 @@ __all__ = [
     "aresultify",
     "secure",
     "asecure",
+    "pack_errs",
+    "unpack_errs",
 ]
 
 T = TypeVar("T")
@@ -50,8 +53,36 @@ class ecode:
     AlreadyProcessed = "already_processed_err"
     Unsupported = "unsupported_err"
     Lock = "lock_err"
+    Timeout = "timeout_err"
+
+ErrWire = tuple[str, str | None, tuple[FrameRecord, ...]]
+"""
+Compact picklable form of an err: code, msg and traceback frame records.
+"""
+ErrBatchWire = tuple[
+    tuple[str, ...],
+    tuple[str, ...],
+    tuple[tuple[str, str | None, tuple[tuple[int, int, int], ...]], ...],
+]
+"""
+Compact form of many errs: interned filenames, interned function names and
+errs with frame records referencing both tables by index.
+"""
+
+def _fmt_err_msg(code: str, msg: str | None) -> str:
+    final = code
+    if msg:
+        final += ": " + msg
+    return final
 
 class Err(Exception):
+    """
+    Err value.
+
+    Errs are pickled in the compact ``ErrWire`` form, so they can be sent
+    between processes. The traceback is replaced by ``frames`` records on
+    the receiving side, which ``log.track`` renders the same way.
+    """
     def __init__(
         self,
         msg: str | None = None,
@@ -65,9 +96,8 @@ class Err(Exception):
             panic(f"`skip_frames` must be positive, got {skip_frames}")
         self.code = code
         self.msg = msg
-        final = code
-        if msg:
-            final += ": " + msg
+        self.frames: list[FrameRecord] | None = None
+        final = _fmt_err_msg(code, msg)
         # since we don't raise, for each err we create traceback dynamically
         # upon creation, and skip this function frame, as well as others,
         # if the caller's code need it
@@ -77,6 +107,31 @@ class Err(Exception):
     def __hash__(self) -> int:
         return hash(self.code)
 
+    def __reduce__(self):
+        return (type(self).unpack, (self.pack(),))
+
+    def pack(self) -> ErrWire:
+        """
+        Packs the err into the compact picklable form.
+
+        Only code, msg and traceback frames are kept, other attributes of
+        subclasses are dropped.
+        """
+        frames = self.frames
+        if frames is None:
+            frames = traceback.get_frames(self)
+        return (self.code, self.msg, tuple(frames))
+
+    @classmethod
+    def unpack(cls, wire: ErrWire) -> Self:
+        code, msg, frames = wire
+        err = cls.__new__(cls)
+        Exception.__init__(err, _fmt_err_msg(code, msg))
+        err.code = code
+        err.msg = msg
+        err.frames = list(frames)
+        return err
+
     def is_(self, code: str) -> bool:
         return self.code == code
 
@@ -85,7 +140,7 @@ class Err(Exception):
 
     @classmethod
     def from_native(cls, exc: Exception) -> Self:
-        return cls("; ".join(exc.args), skip_frames=1)
+        return cls("; ".join(str(arg) for arg in exc.args), skip_frames=1)
 
     def is_ok(self) -> Literal[False]:
         return False
@@ -229,10 +284,13 @@ class Coded(BaseModel, Generic[T]):
 class Code:
     """
     Manages attached to various objects str codes.
+
+    Reads are guarded by the read side of a reader-writer lock, so they run
+    concurrently and wait only for ``upd``.
     """
     _code_to_type: dict[str, type] = {}
     _codes: list[str] = []
-    _lock: Lock = Lock()
+    _lock: RWLock = RWLock()
 
     @classmethod
     def has_code(cls, code: str) -> bool:
@@ -240,10 +298,10 @@ class Code:
 
     @classmethod
     async def get_regd_code_by_id(cls, id: int) -> Res[str]:
-        await cls._lock.wait()
-        if id > len(cls._codes) - 1:
-            return Err(f"codeid {id} is not regd")
-        return Ok(cls._codes[id])
+        async with cls._lock.read():
+            if id > len(cls._codes) - 1:
+                return Err(f"codeid {id} is not regd")
+            return Ok(cls._codes[id])
 
     @classmethod
     async def get_regd_codeid_by_type(cls, t: type) -> Res[int]:
@@ -255,30 +313,30 @@ class Code:
 
     @classmethod
     async def get_regd_codes(cls) -> Res[list[str]]:
-        await cls._lock.wait()
-        return Ok(cls._codes.copy())
+        async with cls._lock.read():
+            return Ok(cls._codes.copy())
 
     @classmethod
     async def get_regd_code_by_type(cls, t: type) -> Res[str]:
-        await cls._lock.wait()
-        for c, t_ in cls._code_to_type.items():
-            if t_ is t:
-                return Ok(c)
-        return Err(f"type {t} is not regd")
+        async with cls._lock.read():
+            for c, t_ in cls._code_to_type.items():
+                if t_ is t:
+                    return Ok(c)
+            return Err(f"type {t} is not regd")
 
     @classmethod
     async def get_regd_codeid(cls, code: str) -> Res[int]:
-        await cls._lock.wait()
-        if code not in cls._codes:
-            return Err(f"code {code} is not regd")
-        return Ok(cls._codes.index(code))
+        async with cls._lock.read():
+            if code not in cls._codes:
+                return Err(f"code {code} is not regd")
+            return Ok(cls._codes.index(code))
 
     @classmethod
     async def get_regd_type_by_code(cls, code: str) -> Res[type]:
-        await cls._lock.wait()
-        if code not in cls._code_to_type:
-            return Err(f"code {code} is not regd")
-        return Ok(cls._code_to_type[code])
+        async with cls._lock.read():
+            if code not in cls._code_to_type:
+                return Err(f"code {code} is not regd")
+            return Ok(cls._code_to_type[code])
 
     @classmethod
     async def upd(
@@ -286,7 +344,7 @@ class Code:
         types: Iterable[type | Coded[type]],
         order: list[str] | None = None,
     ) -> Res[None]:
-        async with cls._lock:
+        async with cls._lock.write():
             for t in types:
                 final_t: type
                 if isinstance(t, Coded):
@@ -323,7 +381,7 @@ class Code:
     def destroy(cls):
         cls._code_to_type.clear()
         cls._codes.clear()
-        cls._lock = Lock()
+        cls._lock = RWLock()
 
     @classmethod
     def _order(cls, order: list[str]) -> Res[None]:
@@ -443,5 +501,39 @@ async def asecure(coro: Coroutine[Any, Any, Res[T_co]]) -> Res[T_co]:
     except Exception as err:
         return Err.from_native(err)
 
+def pack_errs(errs: Iterable[Err]) -> ErrBatchWire:
+    """
+    Packs many errs at once, interning filenames and function names.
+
+    Each filename and function name is stored once per batch and frames
+    refer to them by index. Pickle already memoizes repeated strings, so
+    the pickled batch is only slightly smaller than pickled separate
+    errs; the gain is mostly for formats without such memoization.
+    """
+    filenames: dict[str, int] = {}
+    names: dict[str, int] = {}
+    packed = []
+    for err in errs:
+        code, msg, frames = err.pack()
+        packed.append((code, msg, tuple(
+            (
+                filenames.setdefault(filename, len(filenames)),
+                lineno,
+                names.setdefault(name, len(names)),
+            )
+            for filename, lineno, name in frames
+        )))
+    return (tuple(filenames), tuple(names), tuple(packed))
+
+def unpack_errs(batch: ErrBatchWire) -> list[Err]:
+    filenames, names, packed = batch
+    return [
+        Err.unpack((code, msg, tuple(
+            (filenames[filename], lineno, names[name])
+            for filename, lineno, name in frames
+        )))
+        for code, msg, frames in packed
+    ]
+
 def panic(msg: str | None = None) -> NoReturn:
     raise Err(msg, ecode.Panic)
@@ -6,18 +6,70 @@ itself.
 
 See password hashing https://stackoverflow.com/a/23768422/14748231
 """
+import asyncio
+import math
+import os
+import threading
+import time
+from concurrent.futures import (
+    Executor,
+    Future,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+)
+from typing import Any, Callable, ClassVar, Iterable
+
 import bcrypt
+from pydantic import BaseModel
+
+from ryz.core import Err, Ok, Res, ecode
 
 
+class CryptoMetrics(BaseModel):
+    submitted: int
+    completed: int
+    queued: int
+    """
+    Number of operations waiting for a free worker.
+    """
+    peak_queued: int
+    latency_total: float
+    """
+    Total seconds from submitting operations to their completion.
+    """
+    latency_max: float
+
 class CryptoUtils:
+    """
+    Async and batch operations are run on a shared executor, which caps the
+    number of concurrently hashed passwords. Set it up by
+    ``setup_executor``, by default it is a thread pool with a thread per
+    CPU, since bcrypt releases the GIL.
+
+    New hashes are made with the bcrypt cost of ``cost``, which can be
+    tuned for the machine by ``calibrate_cost``. Hashes made with another
+    cost stay valid, and can be upgraded on login by
+    ``check_and_rehash_password``.
+    """
+    cost: ClassVar[int] = 12
+    _executor: ClassVar[Executor | None] = None
+    _max_workers: ClassVar[int] = 1
+    _metrics_lock: ClassVar[threading.Lock] = threading.Lock()
+    _submitted: ClassVar[int] = 0
+    _completed: ClassVar[int] = 0
+    _peak_queued: ClassVar[int] = 0
+    _latency_total: ClassVar[float] = 0.0
+    _latency_max: ClassVar[float] = 0.0
+
     @classmethod
     def hash_password(
         cls,
         plain_password_bytes: bytes,
+        cost: int | None = None,
     ) -> bytes:
         return bcrypt.hashpw(
             plain_password_bytes,
-            bcrypt.gensalt(12),
+            bcrypt.gensalt(cls.cost if cost is None else cost),
         )
 
     @classmethod
@@ -30,3 +82,223 @@ class CryptoUtils:
             plain_password_bytes,
             hashed_password_bytes,
         )
+
+    @classmethod
+    def get_cost(cls, hashed_password_bytes: bytes) -> Res[int]:
+        """
+        Gets the bcrypt cost from a hash, e.g. 12 from "$2b$12$...".
+        """
+        parts = hashed_password_bytes.split(b"$", 3)
+        if len(parts) != 4 or not parts[2].isdigit():  # noqa: PLR2004
+            return Err("malformed bcrypt hash", ecode.Val)
+        return Ok(int(parts[2]))
+
+    @classmethod
+    def needs_rehash(cls, hashed_password_bytes: bytes) -> bool:
+        """
+        Checks whether a hash is made with a cost other than the current.
+        """
+        cost_res = cls.get_cost(hashed_password_bytes)
+        return isinstance(cost_res, Err) or cost_res.ok != cls.cost
+
+    @classmethod
+    def check_and_rehash_password(
+        cls,
+        plain_password_bytes: bytes,
+        hashed_password_bytes: bytes,
+    ) -> tuple[bool, bytes | None]:
+        """
+        Checks a password and makes a new hash of it if the password is
+        correct and the hash needs rehash.
+
+        Returns:
+            Check result and the new hash to store, if any.
+        """
+        if not cls.check_password(plain_password_bytes, hashed_password_bytes):
+            return False, None
+        if not cls.needs_rehash(hashed_password_bytes):
+            return True, None
+        return True, cls.hash_password(plain_password_bytes)
+
+    @classmethod
+    async def acheck_and_rehash_password(
+        cls,
+        plain_password_bytes: bytes,
+        hashed_password_bytes: bytes,
+    ) -> tuple[bool, bytes | None]:
+        """
+        Same as check_and_rehash_password(), but runs on the executor.
+        """
+        if not await cls.acheck_password(
+            plain_password_bytes, hashed_password_bytes,
+        ):
+            return False, None
+        if not cls.needs_rehash(hashed_password_bytes):
+            return True, None
+        return True, await cls.ahash_password(plain_password_bytes)
+
+    @classmethod
+    def calibrate_cost(
+        cls,
+        target_seconds: float = 0.25,
+        *,
+        min_cost: int = 4,
+        max_cost: int = 31,
+        is_applied: bool = True,
+    ) -> int:
+        """
+        Finds the highest bcrypt cost, with which hashing on this machine
+        takes no more than the target time.
+
+        Hashing time doubles with each cost step, so it is measured at a
+        cheap cost, extrapolated, and then verified at the found cost.
+
+        Args:
+            target_seconds:
+                Max time of hashing a password.
+            min_cost:
+                Cost to return if even it takes more than the target.
+            max_cost:
+                Max cost to return.
+            is_applied:
+                Whether to set the found cost as ``cost``.
+
+        Returns:
+            Cost found.
+        """
+        probe_cost = max(min_cost, 6)
+        probe_seconds = cls._measure_hashing(probe_cost)
+        found_cost = probe_cost + math.floor(
+            math.log2(target_seconds / probe_seconds))
+        found_cost = min(max(found_cost, min_cost), max_cost)
+        while (
+            found_cost > min_cost
+            and cls._measure_hashing(found_cost) > target_seconds
+        ):
+            found_cost -= 1
+        if is_applied:
+            cls.cost = found_cost
+        return found_cost
+
+    @classmethod
+    def _measure_hashing(cls, cost: int, repeats: int = 3) -> float:
+        """
+        Measures the best time of hashing with the cost.
+        """
+        best = math.inf
+        for _ in range(repeats):
+            start = time.perf_counter()
+            cls.hash_password(b"calibration", cost)
+            best = min(best, time.perf_counter() - start)
+        return best
+
+    @classmethod
+    async def ahash_password(cls, plain_password_bytes: bytes) -> bytes:
+        return await asyncio.wrap_future(
+            cls._submit(cls.hash_password, plain_password_bytes, cls.cost))
+
+    @classmethod
+    async def acheck_password(
+        cls,
+        plain_password_bytes: bytes,
+        hashed_password_bytes: bytes,
+    ) -> bool:
+        return await asyncio.wrap_future(cls._submit(
+            cls.check_password,
+            plain_password_bytes,
+            hashed_password_bytes,
+        ))
+
+    @classmethod
+    def check_passwords(
+        cls,
+        pairs: Iterable[tuple[bytes, bytes]],
+    ) -> list[bool]:
+        """
+        Checks many pairs of plain and hashed passwords on the executor.
+
+        Returns check results in order of the pairs.
+        """
+        futs = [cls._submit(cls.check_password, *pair) for pair in pairs]
+        return [fut.result() for fut in futs]
+
+    @classmethod
+    async def acheck_passwords(
+        cls,
+        pairs: Iterable[tuple[bytes, bytes]],
+    ) -> list[bool]:
+        """
+        Same as check_passwords(), but awaits the results.
+        """
+        futs = [
+            asyncio.wrap_future(cls._submit(cls.check_password, *pair))
+            for pair in pairs
+        ]
+        return list(await asyncio.gather(*futs))
+
+    @classmethod
+    def setup_executor(
+        cls,
+        max_workers: int | None = None,
+        *,
+        use_processes: bool = False,
+    ):
+        """
+        Replaces the executor of async and batch operations.
+
+        Operations already submitted to the old executor are completed.
+
+        Args:
+            max_workers:
+                Max number of concurrent operations. Defaults to None,
+                which is the number of CPUs.
+            use_processes:
+                Whether to use processes instead of threads.
+        """
+        old_executor = cls._executor
+        cls._max_workers = max_workers or os.cpu_count() or 1
+        if use_processes:
+            cls._executor = ProcessPoolExecutor(cls._max_workers)
+        else:
+            cls._executor = ThreadPoolExecutor(
+                cls._max_workers, thread_name_prefix="ryz_crypto")
+        if old_executor is not None:
+            old_executor.shutdown(wait=False)
+
+    @classmethod
+    def metrics(cls) -> CryptoMetrics:
+        with cls._metrics_lock:
+            return CryptoMetrics(
+                submitted=cls._submitted,
+                completed=cls._completed,
+                queued=cls._count_queued(),
+                peak_queued=cls._peak_queued,
+                latency_total=cls._latency_total,
+                latency_max=cls._latency_max,
+            )
+
+    @classmethod
+    def _count_queued(cls) -> int:
+        # the pool runs up to max workers ops at once, the rest are queued
+        return max(0, cls._submitted - cls._completed - cls._max_workers)
+
+    @classmethod
+    def _submit(cls, fn: Callable, *args: Any) -> Future:
+        if cls._executor is None:
+            cls.setup_executor()
+        assert cls._executor is not None
+        start = time.monotonic()
+        with cls._metrics_lock:
+            cls._submitted += 1
+            cls._peak_queued = max(cls._peak_queued, cls._count_queued())
+        fut = cls._executor.submit(fn, *args)
+        fut.add_done_callback(lambda _: cls._on_done(start))
+        return fut
+
+    @classmethod
+    def _on_done(cls, start: float):
+        latency = time.monotonic() - start
+        with cls._metrics_lock:
+            cls._completed += 1
+            cls._latency_total += latency
+            cls._latency_max = max(cls._latency_max, latency)
@@ -1,12 +1,36 @@
 """
 Tools for working with dict-like objects.
 """
-from typing import TypeVar
+import json
+import mmap
+import re
+from pathlib import Path
+from typing import (
+    Any,
+    BinaryIO,
+    Hashable,
+    Iterable,
+    Iterator,
+    Literal,
+    TypeVar,
+)
+
+import yaml
+from dictdiffer.utils import EPSILON, are_different
 
 from ryz.core import Err, Ok, Res, ecode
 
 T = TypeVar("T")
 
+KeyPath = tuple[Hashable, ...]
+
+DiffChange = tuple[Literal["add", "remove", "change"], str | list, Any]
+"""
+Change in the dictdiffer format: action, dotted or list path of the
+container or val, and added or removed key-val pairs, or a pair of old and
+new vals.
+"""
+
 def get_recursive(d: dict, key: str, default: T | None = None) -> Res[T]:
     for k, v in d.items():
         if key == k:
@@ -22,3 +46,670 @@ def get_recursive(d: dict, key: str, default: T | None = None) -> Res[T]:
     if default is None:
         return Err(f"val for key {key}", ecode.NotFound)
     return Ok(default)
+
+def get_recursive_many(
+    d: dict,
+    keys: Iterable[Hashable],
+    default: T | None = None,
+) -> dict[Hashable, Res[T]]:
+    """
+    Gets vals for many keys in one walk over the dict.
+
+    Results for each key are the same as of ``get_recursive``. The walk
+    stops once all keys are found.
+    """
+    left = set(keys)
+    f: dict[Hashable, Res[T]] = {}
+    for _, path, v in _walk(d):
+        k = path[-1]
+        if k in left:
+            f[k] = Ok(v)
+            left.remove(k)
+            if not left:
+                break
+    _fill_missing(f, left, default)
+    return f
+
+def get_path(d: dict, path: str | Iterable[Hashable]) -> Res[Any]:
+    """
+    Gets val by a path of keys.
+
+    Args:
+        d:
+            Dict to get the val from.
+        path:
+            Keys from the top-level one to the target one. A string is
+            split by dots, e.g. "db.conn.host".
+    """
+    keys = path.split(".") if isinstance(path, str) else path
+    cur: Any = d
+    for k in keys:
+        if not isinstance(cur, dict) or k not in cur:
+            return Err(f"val for path {path}", ecode.NotFound)
+        cur = cur[k]
+    return Ok(cur)
+
+class KeyIndex:
+    """
+    Index of keys of a nested dict.
+
+    Maps each key to all paths where it occurs, in the order they are
+    visited by ``get_recursive``, so the first path is what
+    ``get_recursive`` finds.
+
+    Vals are read from the dict at lookup time, so changed vals are seen
+    without a rebuild. Adding or removing keys, or replacing nested dicts
+    makes the index stale, which is checked by ``is_stale``.
+    """
+    def __init__(self, d: dict):
+        self.d = d
+        self.rebuild()
+
+    def rebuild(self):
+        self._paths: dict[Hashable, list[KeyPath]] = {}
+        # container dict and key of each path, to read vals without walking
+        self._refs: dict[Hashable, list[tuple[dict, Hashable]]] = {}
+        # indexed dicts with their sizes, and nested dicts with their
+        # containers, to detect structure changes
+        self._sizes: list[tuple[dict, int]] = [(self.d, len(self.d))]
+        self._nested: list[tuple[dict, Hashable, dict]] = []
+
+        for container, path, v in _walk(self.d):
+            k = path[-1]
+            self._paths.setdefault(k, []).append(path)
+            self._refs.setdefault(k, []).append((container, k))
+            if isinstance(v, dict):
+                self._sizes.append((v, len(v)))
+                self._nested.append((container, k, v))
+
+    def is_stale(self) -> bool:
+        """
+        Checks whether the dict's structure has changed since indexing.
+
+        Takes O(n) of the number of keys, but does not build paths, so it is
+        cheaper than a rebuild.
+        """
+        for container, size in self._sizes:
+            if len(container) != size:
+                return True
+        for refs in self._refs.values():
+            for container, k in refs:
+                if k not in container:
+                    return True
+        # with the same keys, the number of nested dicts can change only by
+        # replacing vals
+        nested_count = 0
+        for container, _ in self._sizes:
+            for v in container.values():
+                if isinstance(v, dict):
+                    nested_count += 1
+        if nested_count != len(self._nested):
+            return True
+        return any(
+            container[k] is not v for container, k, v in self._nested
+        )
+
+    def get(self, key: Hashable, default: T | None = None) -> Res[T]:
+        """
+        Gets the val of the first occurrence of a key, the same as
+        ``get_recursive``.
+        """
+        refs = self._refs.get(key)
+        if refs:
+            container, k = refs[0]
+            return Ok(container[k])
+        if default is None:
+            return Err(f"val for key {key}", ecode.NotFound)
+        return Ok(default)
+
+    def get_many(
+        self,
+        keys: Iterable[Hashable],
+        default: T | None = None,
+    ) -> dict[Hashable, Res[T]]:
+        return {k: self.get(k, default) for k in keys}
+
+    def get_all(self, key: Hashable) -> list[Any]:
+        """
+        Gets vals of all occurrences of a key.
+        """
+        return [container[k] for container, k in self._refs.get(key, [])]
+
+    def get_paths(self, key: Hashable) -> list[KeyPath]:
+        return list(self._paths.get(key, []))
+
+    def get_path(self, path: str | Iterable[Hashable]) -> Res[Any]:
+        return get_path(self.d, path)
+
+def _walk(d: dict) -> Iterator[tuple[dict, KeyPath, Any]]:
+    """
+    Iterates containers, paths and vals of a nested dict in the order of
+    ``get_recursive``: depth-first, each key before its nested dict.
+    """
+    stack: list[tuple[dict, KeyPath, Iterator]] = [(d, (), iter(d.items()))]
+    while stack:
+        container, prefix, items = stack[-1]
+        for k, v in items:
+            path = (*prefix, k)
+            yield container, path, v
+            if isinstance(v, dict):
+                stack.append((v, path, iter(v.items())))
+                break
+        else:
+            stack.pop()
+
+def _fill_missing(
+    f: dict[Hashable, Res[T]],
+    keys: Iterable[Hashable],
+    default: T | None,
+):
+    for k in keys:
+        if default is None:
+            f[k] = Err(f"val for key {k}", ecode.NotFound)
+        else:
+            f[k] = Ok(default)
+
+def get_recursive_from_file(  # noqa: PLR0913
+    path: Path | str,
+    key: Hashable,
+    default: T | None = None,
+    *,
+    fmt: Literal["json", "yaml"] | None = None,
+    use_mmap: bool = False,
+    chunk_size: int = 1 << 20,
+) -> Res[T]:
+    """
+    Gets val for a key from a JSON or YAML file, the same as
+    ``get_recursive`` on the loaded document, but without loading it.
+
+    See ``get_recursive_many_from_file`` for args.
+    """
+    return get_recursive_many_from_file(
+        path,
+        [key],
+        default,
+        fmt=fmt,
+        use_mmap=use_mmap,
+        chunk_size=chunk_size,
+    )[key]
+
+# args other than get_recursive ones are keyword-only scan options
+def get_recursive_many_from_file(  # noqa: PLR0913
+    path: Path | str,
+    keys: Iterable[Hashable],
+    default: T | None = None,
+    *,
+    fmt: Literal["json", "yaml"] | None = None,
+    use_mmap: bool = False,
+    chunk_size: int = 1 << 20,
+) -> dict[Hashable, Res[T]]:
+    """
+    Gets vals for many keys from a JSON or YAML file.
+
+    The file is scanned incrementally and only vals of found keys are
+    loaded, so memory is bounded by the nesting depth and the size of the
+    found vals. The scan stops once all keys are found.
+
+    Results are the same as of ``get_recursive_many`` on the loaded
+    document, except that YAML merge keys are not expanded, and that of
+    duplicate keys in a mapping the first one is taken, while loaders keep
+    the last one. If the file cannot be read or parsed, all keys get the
+    same err.
+
+    JSON containers nested up to 16 levels are skipped by single regex
+    matches, deeper ones are skipped bracket by bracket, which is several
+    times slower.
+
+    Args:
+        path:
+            Path to the file.
+        keys:
+            Keys to get vals for.
+        default:
+            Val for keys not found. Defaults to None, which is to return
+            ``ecode.NotFound`` err.
+        fmt:
+            Format of the file. Defaults to None, which is to take it from
+            the file extension.
+        use_mmap:
+            Whether to memory-map the file instead of reading it by chunks.
+        chunk_size:
+            Size of chunks to read a JSON file by.
+    """
+    path = Path(path)
+    keys = list(keys)
+    if fmt is None:
+        fmt = _FILE_FMTS.get(path.suffix.lower())
+        if fmt is None:
+            err = Err(f"file format of {path}", ecode.Unsupported)
+            return dict.fromkeys(keys, err)
+
+    f: dict[Hashable, Res[T]] = {}
+    left = set(keys)
+    try:
+        with path.open("rb") as file:
+            if use_mmap and path.stat().st_size > 0:
+                with mmap.mmap(
+                    file.fileno(), 0, access=mmap.ACCESS_READ,
+                ) as m:
+                    _scan_file(fmt, m, left, f, chunk_size)
+            else:
+                _scan_file(fmt, file, left, f, chunk_size)
+    except (OSError, ValueError, yaml.YAMLError) as err:
+        err = Err(f"cannot scan file {path}: {err}", ecode.Val)
+        return dict.fromkeys(keys, err)
+    _fill_missing(f, left, default)
+    return f
+
+_FILE_FMTS: dict[str, Literal["json", "yaml"]] = {
+    ".json": "json",
+    ".yaml": "yaml",
+    ".yml": "yaml",
+}
+
+def _scan_file(
+    fmt: Literal["json", "yaml"],
+    stream: BinaryIO | mmap.mmap,
+    left: set[Hashable],
+    f: dict[Hashable, Res[Any]],
+    chunk_size: int,
+):
+    if fmt == "json":
+        _JsonScanner(stream, chunk_size).scan(left, f)
+    else:
+        _scan_yaml(stream, left, f)
+
+def _find_in_val(v: Any, left: set[Hashable], f: dict[Hashable, Res[Any]]):
+    """
+    Finds left keys in a loaded val, which goes before the rest of the
+    document in the ``get_recursive`` order.
+    """
+    if not isinstance(v, dict) or not left:
+        return
+    for _, path, nested_v in _walk(v):
+        k = path[-1]
+        if k in left:
+            f[k] = Ok(nested_v)
+            left.remove(k)
+            if not left:
+                return
+
+def _make_json_skip_pattern(depth: int) -> bytes:
+    plain = rb'[^"\[\]{}]*'
+    token = rb'"[^"\\]*(?:\\.[^"\\]*)*"'
+    body = plain + rb"(?:" + token + plain + rb")*"
+    for _ in range(depth - 1):
+        container = rb"[\[{]" + body + rb"[\]}]"
+        body = plain + rb"(?:(?:" + token + rb"|" + container + rb")" \
+            + plain + rb")*"
+    return body
+
+class _JsonScanner:
+    """
+    Scans a JSON document by regexes over a buffer of bytes.
+
+    Only dicts are descended into, the same as by ``get_recursive``, other
+    vals are skipped by jumping between brackets.
+
+    For a file, the buffer holds the unscanned part of the last read chunks,
+    or a val being loaded. For a memory-mapped file, the buffer is the map.
+    """
+    _WS = re.compile(rb"[ \t\n\r]*")
+    _STR = re.compile(rb'"[^"\\]*(?:\\.[^"\\]*)*"')
+    _SCALAR = re.compile(rb"[^,}\]\s]+")
+    # everything up to the next bracket, including whole strings and
+    # containers nested up to 16 levels, so most vals are skipped by one
+    # match, stops before an unterminated string or container
+    _UNTIL_BRACKET = re.compile(_make_json_skip_pattern(16))
+
+    def __init__(self, stream: BinaryIO | mmap.mmap, chunk_size: int):
+        self._stream = stream
+        self._chunk_size = chunk_size
+        if isinstance(stream, mmap.mmap):
+            self._buf: bytearray | mmap.mmap = stream
+            self._is_eof = True
+        else:
+            self._buf = bytearray()
+            self._is_eof = False
+        self._pos = 0
+        # start of a val being loaded, which must be kept in the buffer
+        self._keep: int | None = None
+
+    def scan(self, left: set[Hashable], f: dict[Hashable, Res[Any]]):
+        self._skip_ws()
+        if self._peek() != b"{"[0]:
+            raise ValueError("top-level val is not an object")
+        self._pos += 1
+        depth = 1
+        while depth and left:
+            self._skip_ws()
+            c = self._peek()
+            if c == b"}"[0]:
+                self._pos += 1
+                depth -= 1
+                continue
+            if c == b","[0]:
+                self._pos += 1
+                continue
+            key = self._read_key()
+            self._skip_ws()
+            if self._peek() != b":"[0]:
+                raise ValueError(f"expected colon after key {key}")
+            self._pos += 1
+            self._skip_ws()
+
+            if key in left:
+                v = self._load_val()
+                f[key] = Ok(v)
+                left.remove(key)
+                _find_in_val(v, left, f)
+            elif self._peek() == b"{"[0]:
+                self._pos += 1
+                depth += 1
+            else:
+                self._skip_val()
+
+    def _read_more(self) -> bool:
+        if self._is_eof:
+            return False
+        assert isinstance(self._buf, bytearray)
+        drop = self._pos if self._keep is None else self._keep
+        del self._buf[:drop]
+        self._pos -= drop
+        if self._keep is not None:
+            self._keep -= drop
+        chunk = self._stream.read(self._chunk_size)
+        if not chunk:
+            self._is_eof = True
+            return False
+        self._buf += chunk
+        return True
+
+    def _peek(self) -> int:
+        while self._pos >= len(self._buf):
+            if not self._read_more():
+                raise ValueError("unexpected end of document")
+        return self._buf[self._pos]
+
+    def _skip_ws(self):
+        while True:
+            self._pos = self._WS.match(self._buf, self._pos).end()
+            if self._pos < len(self._buf) or not self._read_more():
+                return
+
+    def _match_whole(self, regex: re.Pattern) -> int:
+        """
+        Matches a token at the current pos, which must not be cut by the
+        buffer end, and returns its end. The pos is not moved, but can be
+        shifted by reading.
+        """
+        while True:
+            m = regex.match(self._buf, self._pos)
+            if (
+                m is not None
+                and (m.end() < len(self._buf) or self._is_eof)
+            ):
+                return m.end()
+            if not self._read_more():
+                if m is None:
+                    raise ValueError("malformed token")
+                return m.end()
+
+    def _read_key(self) -> str:
+        if self._peek() != b'"'[0]:
+            raise ValueError("expected key string")
+        end = self._match_whole(self._STR)
+        raw = bytes(self._buf[self._pos:end])
+        self._pos = end
+        if b"\\" in raw:
+            return json.loads(raw)
+        return raw[1:-1].decode()
+
+    def _skip_val(self):
+        c = self._peek()
+        if c == b'"'[0]:
+            self._pos = self._match_whole(self._STR)
+            return
+        if c not in b"{[":
+            self._pos = self._match_whole(self._SCALAR)
+            return
+        self._pos += 1
+        depth = 1
+        while True:
+            self._pos = self._UNTIL_BRACKET.match(self._buf, self._pos).end()
+            if self._pos >= len(self._buf) or self._buf[self._pos] == b'"'[0]:
+                # a string is cut by the buffer end
+                if not self._read_more():
+                    raise ValueError("unexpected end of document")
+                continue
+            c = self._buf[self._pos]
+            self._pos += 1
+            if c in b"{[":
+                depth += 1
+            else:
+                depth -= 1
+                if depth == 0:
+                    return
+
+    def _load_val(self) -> Any:
+        self._keep = self._pos
+        try:
+            self._skip_val()
+            return json.loads(self._buf[self._keep:self._pos])
+        finally:
+            self._keep = None
+
+def _scan_yaml(
+    stream: BinaryIO | mmap.mmap,
+    left: set[Hashable],
+    f: dict[Hashable, Res[Any]],
+):
+    """
+    Scans a YAML document by parser events.
+
+    Only vals of found keys are composed and constructed, except for
+    anchored vals, which are composed to resolve aliases to them.
+    """
+    loader = yaml.SafeLoader(stream)
+    try:
+        loader.get_event()
+        if loader.check_event(yaml.DocumentStartEvent):
+            loader.get_event()
+        if not loader.check_event(yaml.MappingStartEvent):
+            raise ValueError("top-level val is not a mapping")
+        loader.get_event()
+        depth = 1
+        while depth and left:
+            if loader.check_event(yaml.MappingEndEvent):
+                loader.get_event()
+                depth -= 1
+                continue
+            key = loader.construct_document(loader.compose_node(None, None))
+            try:
+                is_found = key in left
+            except TypeError:
+                # unhashable key
+                is_found = False
+
+            event = loader.peek_event()
+            is_anchored = _is_anchored_yaml_event(event)
+            if is_found or is_anchored:
+                v = loader.construct_document(loader.compose_node(None, None))
+                if is_found:
+                    f[key] = Ok(v)
+                    left.remove(key)
+                _find_in_val(v, left, f)
+            elif isinstance(event, yaml.MappingStartEvent):
+                loader.get_event()
+                depth += 1
+            else:
+                _skip_yaml_node(loader)
+    finally:
+        loader.dispose()
+
+def _is_anchored_yaml_event(event: yaml.Event) -> bool:
+    return (
+        isinstance(event, (yaml.ScalarEvent, yaml.CollectionStartEvent))
+        and event.anchor is not None
+    )
+
+def _skip_yaml_node(loader: yaml.SafeLoader):
+    depth = 0
+    while True:
+        if _is_anchored_yaml_event(loader.peek_event()):
+            loader.compose_node(None, None)
+        else:
+            event = loader.get_event()
+            if isinstance(event, yaml.CollectionStartEvent):
+                depth += 1
+            elif isinstance(event, yaml.CollectionEndEvent):
+                depth -= 1
+        if depth == 0:
+            return
+
+def diff(first: Any, second: Any) -> Iterator[DiffChange]:
+    """
+    Iterates changes from the first dict to the second one.
+
+    Changes are the same as of ``dictdiffer.diff``, and can be applied by
+    either ``patch`` or ``dictdiffer.patch``, but vals in changes are
+    references to vals of the dicts, not deep copies.
+
+    Identical nested containers are skipped without comparing, so diffing
+    a dict with its version made by ``patch``, which shares unchanged
+    containers, takes time proportional to the changes.
+    """
+    # containers being compared, each with its path and iterator of keys
+    # left to compare
+    stack: list[tuple[Any, Any, list, Iterator]] = []
+    yield from _diff_vals(first, second, [], stack)
+    while stack:
+        frame = stack[-1]
+        a, b, node, keys = frame
+        for k in keys:
+            yield from _diff_vals(a[k], b[k], [*node, k], stack)
+            if stack[-1] is not frame:
+                break
+        else:
+            stack.pop()
+            yield from _diff_tail(a, b, node)
+
+def patch(changes: Iterable[DiffChange], d: T) -> Res[T]:
+    """
+    Applies changes to a copy of a dict.
+
+    Only containers on paths of changes are copied, others are shared with
+    the original dict. Changes are consumed one by one, so can be streamed.
+    """
+    root = _shallow_copy(d)
+    # ids of containers copied by this patch, so they are copied once
+    copied = {id(root)}
+    try:
+        for action, node, val in changes:
+            keys = _split_diff_node(node)
+            if action == "change":
+                if not keys:
+                    root = _shallow_copy(val[1])
+                    copied = {id(root)}
+                    continue
+                container = _copy_path(root, keys[:-1], copied)
+                container[_get_container_key(container, keys[-1])] = val[1]
+                continue
+            container = _copy_path(root, keys, copied)
+            for k, v in val:
+                if isinstance(container, set):
+                    if action == "add":
+                        container |= v
+                    else:
+                        container -= v
+                elif action == "remove":
+                    del container[k]
+                elif isinstance(container, list):
+                    container.insert(k, v)
+                else:
+                    container[k] = v
+    except (KeyError, IndexError, TypeError, ValueError) as err:
+        return Err(f"cannot apply change at {node}: {err!r}", ecode.Val)
+    return Ok(root)
+
+def _diff_vals(
+    a: Any,
+    b: Any,
+    node: list,
+    stack: list[tuple[Any, Any, list, Iterator]],
+) -> Iterator[DiffChange]:
+    """
+    Compares two vals, pushing them to the stack if they are containers of
+    the same kind, otherwise yielding a change.
+    """
+    if a is b:
+        return
+    if isinstance(a, dict) and isinstance(b, dict):
+        keys = [k for k in a if k in b and a[k] is not b[k]]
+    elif isinstance(a, list) and isinstance(b, list):
+        keys = [i for i in range(min(len(a), len(b))) if a[i] is not b[i]]
+    elif isinstance(a, set) and isinstance(b, set):
+        added = b - a
+        if added:
+            yield "add", _dot_diff_node(node), [(0, added)]
+        removed = a - b
+        if removed:
+            yield "remove", _dot_diff_node(node), [(0, removed)]
+        return
+    else:
+        if are_different(a, b, EPSILON):
+            yield "change", _dot_diff_node(node), (a, b)
+        return
+    stack.append((a, b, node, iter(keys)))
+
+def _diff_tail(a: Any, b: Any, node: list) -> Iterator[DiffChange]:
+    """
+    Yields added and removed keys of containers, which go after changes of
+    their common keys.
+    """
+    if isinstance(a, dict):
+        added = [(k, v) for k, v in b.items() if k not in a]
+        removed = [(k, v) for k, v in a.items() if k not in b]
+    else:
+        added = [(i, b[i]) for i in range(len(a), len(b))]
+        removed = [(i, a[i]) for i in reversed(range(len(b), len(a)))]
+    if added:
+        yield "add", _dot_diff_node(node), added
+    if removed:
+        yield "remove", _dot_diff_node(node), removed
+
+def _dot_diff_node(node: list) -> str | list:
+    if all(isinstance(k, str) and "." not in k for k in node):
+        return ".".join(node)
+    return node
+
+def _split_diff_node(node: str | list) -> list:
+    if isinstance(node, str):
+        return node.split(".") if node else []
+    return list(node)
+
+def _get_container_key(container: Any, k: Hashable) -> Hashable:
+    if isinstance(container, list):
+        return int(k)
+    return k
+
+def _shallow_copy(v: Any) -> Any:
+    if isinstance(v, (dict, list, set)):
+        return v.copy()
+    return v
+
+def _copy_path(root: Any, keys: list, copied: set[int]) -> Any:
+    """
+    Gets the container at the path, copying containers on the path that are
+    not copied yet.
+    """
+    container = root
+    for node_k in keys:
+        k = _get_container_key(container, node_k)
+        child = container[k]
+        if id(child) not in copied:
+            child = _shallow_copy(child)
+            copied.add(id(child))
+            container[k] = child
+        container = child
+    return container
@@ -2,11 +2,21 @@
 
 Typically here collected functions which return string.
 """
+import functools
 import re
-from typing import Any
+from typing import Any, Callable, Iterable
 
 from ryz.cls import Static
 
+FMT_CACHE_SIZE = 4096
+"""
+Max number of names remembered by each cached conversion.
+"""
+
+_SNAKE_WORD_RE = re.compile("(.)([A-Z][a-z]+)")
+_SNAKE_DOUBLE_UNDERSCORE_RE = re.compile("__([A-Z])")
+_SNAKE_LOWER_UPPER_RE = re.compile("([a-z0-9])([A-Z])")
+
 
 class FormatUtils(Static):
     @staticmethod
@@ -28,6 +38,7 @@ class FormatUtils(Static):
         return name.lower().replace("_", "-")
 
     @staticmethod
+    @functools.lru_cache(maxsize=FMT_CACHE_SIZE)
     def snakefy(name: str) -> str:
         """Converts name to snake_case.
 
@@ -41,12 +52,13 @@ class FormatUtils(Static):
             Name converted.
         """
         # Reference: https://stackoverflow.com/a/1176023/14748231
-        name = re.sub("(.)([A-Z][a-z]+)", r"\1_\2", name)
-        name = re.sub("__([A-Z])", r"_\1", name)
-        name = re.sub("([a-z0-9])([A-Z])", r"\1_\2", name)
+        name = _SNAKE_WORD_RE.sub(r"\1_\2", name)
+        name = _SNAKE_DOUBLE_UNDERSCORE_RE.sub(r"_\1", name)
+        name = _SNAKE_LOWER_UPPER_RE.sub(r"\1_\2", name)
         return name.lower()
 
     @staticmethod
+    @functools.lru_cache(maxsize=FMT_CACHE_SIZE)
     def pascalify(name: str) -> str:
         """Converts name to PascalCase.
 
@@ -57,25 +69,67 @@ class FormatUtils(Static):
         Returns:
             Name converted.
         """
-        result: str = ""
+        parts: list[str] = []
         is_previous_underscore: bool = True
+        last_i = len(name) - 1
 
         for i, char in enumerate(name):
             if is_previous_underscore:
-                if char == "_":
-                    result += char
-                else:
-                    result += char.upper()
-            elif char != "_":
-                result += char
-            else:
-                try:
-                    next_char: str = name[i + 1]
-                except IndexError:
-                    result += char
-                else:
-                    if next_char == "_":
-                        result += char
+                parts.append(char.upper())
+            elif char != "_" or i == last_i or name[i + 1] == "_":
+                # single underscores between words are dropped
+                parts.append(char)
             is_previous_underscore = char == "_"
 
-        return result
+        return "".join(parts)
+
+    @staticmethod
+    def snakefy_many(names: Iterable[str]) -> list[str]:
+        return list(map(FormatUtils.snakefy, names))
+
+    @staticmethod
+    def pascalify_many(names: Iterable[str]) -> list[str]:
+        return list(map(FormatUtils.pascalify, names))
+
+    @staticmethod
+    def convert_keys(
+        d: dict[str, Any],
+        convert: Callable[[str], str],
+        *,
+        is_recursive: bool = False,
+    ) -> dict[str, Any]:
+        """Converts keys of dict by a conversion, e.g. snakefy().
+
+        Args:
+            d:
+                Dict to convert keys of.
+            convert:
+                Conversion of keys.
+            is_recursive:
+                Whether to convert keys of nested dicts too, including
+                dicts in lists.
+
+        Returns:
+            New dict with keys converted.
+        """
+        if not is_recursive:
+            return dict(zip(map(convert, d), d.values(), strict=True))
+        return {
+            convert(k): FormatUtils._convert_nested_keys(v, convert)
+            for k, v in d.items()
+        }
+
+    @staticmethod
+    def clear_caches():
+        """Clears caches of conversions.
+        """
+        FormatUtils.snakefy.cache_clear()
+        FormatUtils.pascalify.cache_clear()
+
+    @staticmethod
+    def _convert_nested_keys(val: Any, convert: Callable[[str], str]) -> Any:
+        if isinstance(val, dict):
+            return FormatUtils.convert_keys(val, convert, is_recursive=True)
+        if isinstance(val, list):
+            return [FormatUtils._convert_nested_keys(x, convert) for x in val]
+        return val
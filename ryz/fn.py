@@ -1,4 +1,13 @@
-from typing import Generic, Protocol, TypeVar
+import typing
+from concurrent.futures import (
+    Executor,
+    Future,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+)
+from typing import Generic, Iterable, Literal, Protocol, TypeVar
+
+from ryz.core import Err, Ok, Res, panic
 
 T_co = TypeVar("T_co", covariant=True)
 class ArbFn(Protocol, Generic[T_co]):
@@ -7,6 +16,9 @@ class ArbFn(Protocol, Generic[T_co]):
 class FnSpec(Generic[T_co]):
     """
     Holds information about some function.
+
+    Args and kwargs are normalized on set, so a call without extras passes
+    them as is.
     """
     def __init__(
         self,
@@ -18,6 +30,24 @@ class FnSpec(Generic[T_co]):
         self.args = args
         self.kwargs = kwargs
 
+    @property
+    def args(self) -> tuple | None:
+        return self._args_or_none
+
+    @args.setter
+    def args(self, val: tuple | None):
+        self._args_or_none = val
+        self._args: tuple = () if val is None else val
+
+    @property
+    def kwargs(self) -> dict | None:
+        return self._kwargs_or_none
+
+    @kwargs.setter
+    def kwargs(self, val: dict | None):
+        self._kwargs_or_none = val
+        self._kwargs: dict = {} if val is None else val
+
     def call(
         self,
         *,
@@ -29,28 +59,97 @@ class FnSpec(Generic[T_co]):
         """
         Calls a specified in this spec function.
         """
-        args: tuple = ()
-        if self.args is not None:
-            args = self.args
-
-        kwargs: dict = {}
-        if self.kwargs is not None:
-            kwargs = self.kwargs
-
-        if prepended_extra_args is None:
-            prepended_extra_args = ()
-        if appended_extra_args is None:
-            appended_extra_args = ()
-        if prepended_extra_kwargs is None:
-            prepended_extra_kwargs = {}
-        if appended_extra_kwargs is None:
-            appended_extra_kwargs = {}
-
-        final_args: tuple = prepended_extra_args + args + appended_extra_args
-        final_kwargs: dict = {
-            **prepended_extra_kwargs,
-            **kwargs,
-            **appended_extra_kwargs,
-        }
-
-        return self.func(*final_args, **final_kwargs)
+        args = self._args
+        if prepended_extra_args:
+            args = prepended_extra_args + args
+        if appended_extra_args:
+            args = args + appended_extra_args
+
+        kwargs = self._kwargs
+        if prepended_extra_kwargs:
+            kwargs = {**prepended_extra_kwargs, **kwargs}
+        if appended_extra_kwargs:
+            kwargs = {**kwargs, **appended_extra_kwargs}
+
+        return self.func(*args, **kwargs)
+
+    def call_res(self) -> Res[T_co]:
+        """
+        Calls the function, returning its result as res.
+
+        If the function returns a res, it is returned as is. Raised errs are
+        returned as errs.
+        """
+        try:
+            result = self.func(*self._args, **self._kwargs)
+        except Err as err:
+            return err
+        except Exception as err:
+            return Err.from_native(err)
+        if isinstance(result, (Ok, Err)):
+            return result
+        return Ok(result)
+
+FnBatchMode = Literal["inline", "thread", "process"]
+
+def call_many(
+    specs: Iterable[FnSpec[T_co]],
+    mode: FnBatchMode = "inline",
+    *,
+    max_workers: int | None = None,
+    chunksize: int = 1,
+) -> list[Res[T_co]]:
+    """
+    Calls functions of many specs, returning a res per spec in order of
+    the specs.
+
+    Args:
+        specs:
+            Specs to call.
+        mode:
+            Where to call: in the current thread, on a thread pool or on a
+            process pool. For processes, specs and results must be
+            picklable.
+        max_workers:
+            Max number of threads or processes. Defaults to None, which is
+            the executor default.
+        chunksize:
+            Number of specs sent to a process at once. If a chunk cannot be
+            sent or its results cannot be received, e.g. on a pickling err
+            or a crashed process, all specs of the chunk get the err.
+    """
+    if mode not in typing.get_args(FnBatchMode):
+        panic(f"unknown batch mode {mode}")
+    if mode == "inline":
+        return [spec.call_res() for spec in specs]
+    if mode == "thread":
+        with ThreadPoolExecutor(max_workers) as executor:
+            return _call_chunks(executor, list(specs), 1)
+    with ProcessPoolExecutor(max_workers) as executor:
+        return _call_chunks(executor, list(specs), chunksize)
+
+def _call_chunks(
+    executor: Executor,
+    specs: list[FnSpec[T_co]],
+    chunksize: int,
+) -> list[Res[T_co]]:
+    chunks = [
+        specs[i:i + chunksize] for i in range(0, len(specs), chunksize)
+    ]
+    futs = [executor.submit(_call_chunk, chunk) for chunk in chunks]
+    f: list[Res[T_co]] = []
+    for chunk, fut in zip(chunks, futs):
+        f.extend(_get_chunk_results(fut, len(chunk)))
+    return f
+
+def _get_chunk_results(
+    fut: Future[list[Res[T_co]]],
+    n: int,
+) -> list[Res[T_co]]:
+    try:
+        return fut.result()
+    except Exception as err:
+        return [Err.from_native(err)] * n
+
+def _call_chunk(specs: list[FnSpec[T_co]]) -> list[Res[T_co]]:
+    return [spec.call_res() for spec in specs]
@@ -2,7 +2,11 @@
 Smart data containers.
 """
 
-from typing import Generic, TypeVar
+import multiprocessing
+import os
+from array import array
+from multiprocessing.shared_memory import SharedMemory
+from typing import Any, Generic, Iterable, TypeVar
 
 from ryz.core import Err, Ok, Res, ecode
 from ryz.range import Range
@@ -32,21 +36,221 @@ class Keeper(Generic[T]):
 class IntKeeper(Keeper[int]):
     """
     Holds available ints for things like consequent ids.
+
+    Given ints are tracked in a bitmap with one bit per int of the range, so
+    the default range takes about 125 KB, plus 8 bytes per freed int until
+    it's given again. Freed ints are given again first, most recently freed
+    first, and after them the lowest never given ints are given. Both
+    ``recv`` and ``free`` are O(1).
     """
     def __init__(self, range_: Range[int] = Range(0, 1_000_000)) -> None:
         super().__init__()
         self._range = range_
-        self._given: set[int] = set()
+        self._min = range_.min
+        self._size = range_.max - range_.min + 1
+        self._bits = bytearray((self._size + 7) // 8)
+        # offsets from the range min
+        self._freed = array("q")
+        # all offsets below the cursor are either given or freed
+        self._cursor = 0
+
+    def has(self, val: int) -> bool:
+        """
+        Checks whether val is currently given.
+        """
+        off = val - self._min
+        if off < 0 or off >= self._size:
+            return False
+        return bool(self._bits[off >> 3] & (1 << (off & 7)))
+
+    def count_available(self) -> int:
+        return self._size - self._cursor + len(self._freed)
 
     def recv(self) -> Res[int]:
-        for possible in self._range.get_python_range():
-            if possible not in self._given:
-                self._given.add(possible)
-                return Ok(possible)
-        return Err("no available values")
+        if self._freed:
+            off = self._freed.pop()
+        elif self._cursor < self._size:
+            off = self._cursor
+            self._cursor += 1
+        else:
+            return Err("no available values")
+        self._bits[off >> 3] |= 1 << (off & 7)
+        return Ok(self._min + off)
+
+    def recv_many(self, n: int) -> Res[list[int]]:
+        """
+        Receives n vals at once.
+
+        If there are less than n available vals, none are given.
+        """
+        if n > self.count_available():
+            return Err(
+                f"cannot give {n} values,"
+                f" only {self.count_available()} are available")
+        from_freed = min(n, len(self._freed))
+        offs = self._freed[len(self._freed) - from_freed:].tolist()
+        offs.reverse()
+        del self._freed[len(self._freed) - from_freed:]
+        offs.extend(range(self._cursor, self._cursor + n - from_freed))
+        self._cursor += n - from_freed
+
+        bits = self._bits
+        for off in offs:
+            bits[off >> 3] |= 1 << (off & 7)
+        return Ok([self._min + off for off in offs])
 
     def free(self, val: int) -> Res[None]:
-        if val not in self._given:
+        if not self.has(val):
             return Err(f"val {val}", ecode.NotFound)
-        self._given.remove(val)
+        off = val - self._min
+        self._bits[off >> 3] &= ~(1 << (off & 7)) & 0xFF
+        self._freed.append(off)
         return Ok(None)
+
+    def free_many(self, vals: Iterable[int]) -> Res[None]:
+        """
+        Frees many vals at once.
+
+        If any of the vals is not given, none are freed.
+        """
+        vals = list(vals)
+        if len(set(vals)) != len(vals):
+            return Err("duplicate values to free")
+        for val in vals:
+            if not self.has(val):
+                return Err(f"val {val}", ecode.NotFound)
+        for val in vals:
+            self.free(val).unwrap()
+        return Ok(None)
+
+class SharedIntKeeper(Keeper[int]):
+    """
+    Holds available ints shared between processes.
+
+    The range is split into blocks of ``block_size`` ints. A process claims
+    a whole block at once, by writing its pid to the block owner table in
+    shared memory under an inter-process lock, and then gives ints of the
+    block locally. So only one of ``block_size`` recvs touches the shared
+    state. Ints can be freed only by the process that received them, and
+    return to that process's local cache.
+
+    The keeper should be created in the parent process and passed to
+    children, e.g. via ``ProcGroup.reg`` proc kwargs. If a child dies, the
+    parent calls ``release`` with the child's pid to return its blocks. The
+    creator calls ``unlink`` once the keeper is no longer used by anyone.
+    """
+    def __init__(
+        self,
+        range_: Range[int] = Range(0, 1_000_000),
+        block_size: int = 1024,
+    ) -> None:
+        super().__init__()
+        self._range = range_
+        self._block_size = block_size
+        self._nblocks = (
+            range_.max - range_.min + 1 + block_size - 1) // block_size
+        self._shm = SharedMemory(create=True, size=self._nblocks * 8)
+        self._lock = multiprocessing.Lock()
+        self._init_local()
+
+    def __getstate__(self) -> dict[str, Any]:
+        return {
+            "range": self._range,
+            "block_size": self._block_size,
+            "shm_name": self._shm.name,
+            "lock": self._lock,
+        }
+
+    def __setstate__(self, state: dict[str, Any]):
+        self._range = state["range"]
+        self._block_size = state["block_size"]
+        self._nblocks = (
+            self._range.max - self._range.min + self._block_size
+        ) // self._block_size
+        self._shm = SharedMemory(state["shm_name"])
+        self._lock = state["lock"]
+        self._init_local()
+
+    def _init_local(self):
+        self._pid = os.getpid()
+        size = self._range.max - self._range.min + 1
+        self._given = bytearray((size + 7) // 8)
+        # offsets from the range min of claimed, but not given ints
+        self._freed = array("q")
+
+    def _check_pid(self):
+        # forked children inherit the parent's local cache, which they must
+        # not use
+        if os.getpid() != self._pid:
+            self._init_local()
+
+    def _claim(self) -> bool:
+        # owner table view is released right away, since shared memory
+        # cannot be closed while there are views on it
+        with self._lock, self._shm.buf.cast("q") as owners:
+            for block in range(self._nblocks):
+                if owners[block] == 0:
+                    owners[block] = self._pid
+                    break
+            else:
+                return False
+        start = block * self._block_size
+        end = min(
+            start + self._block_size, self._range.max - self._range.min + 1)
+        # reversed to give the lowest ints first
+        self._freed.extend(range(end - 1, start - 1, -1))
+        return True
+
+    def recv(self) -> Res[int]:
+        self._check_pid()
+        if not self._freed and not self._claim():
+            return Err("no available values")
+        off = self._freed.pop()
+        self._given[off >> 3] |= 1 << (off & 7)
+        return Ok(self._range.min + off)
+
+    def free(self, val: int) -> Res[None]:
+        self._check_pid()
+        off = val - self._range.min
+        if (
+            off < 0
+            or off >= len(self._given) * 8
+            or not self._given[off >> 3] & (1 << (off & 7))
+        ):
+            return Err(f"val {val}", ecode.NotFound)
+        self._given[off >> 3] &= ~(1 << (off & 7)) & 0xFF
+        self._freed.append(off)
+        return Ok(None)
+
+    def release(self, pid: int) -> int:
+        """
+        Returns all blocks claimed by a process to the shared pool.
+
+        Must be called only for processes which are no longer alive.
+
+        Returns number of released blocks.
+        """
+        count = 0
+        with self._lock, self._shm.buf.cast("q") as owners:
+            for block in range(self._nblocks):
+                if owners[block] == pid:
+                    owners[block] = 0
+                    count += 1
+        return count
+
+    def close(self):
+        """
+        Releases blocks of this process and detaches it from shared memory.
+        """
+        self._check_pid()
+        self.release(self._pid)
+        self._shm.close()
+
+    def unlink(self):
+        """
+        Destroys the shared memory.
+
+        Should be called by the creator once all processes have closed the
+        keeper.
+        """
+        self._shm.unlink()
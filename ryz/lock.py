@@ -1,13 +1,165 @@
 import asyncio
+import contextlib
+import os
+import sys
+import time
+import weakref
+from collections import deque
+from itertools import count
+from pathlib import Path
+from typing import AsyncIterator
 
-from ryz.uuid import uuid4
+if sys.platform != "win32":
+    import fcntl
+
+class Histogram:
+    """
+    Histogram of durations in seconds.
+
+    Bucket 0 counts durations below 1 microsecond, and each next bucket
+    counts durations up to twice as long as the previous one. The last
+    bucket counts all longer durations.
+    """
+    BASE = 1e-6
+    __slots__ = ("counts", "total", "max")
+
+    def __init__(self, bucket_count: int = 32) -> None:
+        self.counts = [0] * bucket_count
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, duration: float):
+        i = int(duration / self.BASE).bit_length()
+        self.counts[min(i, len(self.counts) - 1)] += 1
+        self.total += duration
+        if duration > self.max:
+            self.max = duration
+
+    def get_count(self) -> int:
+        return sum(self.counts)
+
+    def get_bucket_bound(self, i: int) -> float:
+        """
+        Returns upper bound of the bucket.
+        """
+        return self.BASE * 2 ** i
+
+    def get_percentile(self, q: float) -> float:
+        """
+        Returns upper bound of the bucket containing the q-th share of
+        durations.
+        """
+        target = q * self.get_count()
+        acc = 0
+        for i, c in enumerate(self.counts):
+            acc += c
+            if c and acc >= target:
+                return min(self.get_bucket_bound(i), self.max)
+        return 0.0
+
+class LockStats:
+    """
+    Contention stats of an instrumented lock.
+    """
+    __slots__ = (
+        "name",
+        "since",
+        "acquired",
+        "wait",
+        "hold",
+        "peak_waiters",
+        "holder_site",
+        "_acquired_at",
+    )
+
+    def __init__(self, name: str | None) -> None:
+        self.name = name
+        self.since = time.monotonic()
+        self.acquired = 0
+        self.wait = Histogram()
+        self.hold = Histogram()
+        self.peak_waiters = 0
+        self.holder_site: str | None = None
+        self._acquired_at = 0.0
+
+    def get_acquisitions_per_sec(self) -> float:
+        elapsed = time.monotonic() - self.since
+        return self.acquired / elapsed if elapsed > 0 else 0.0
+
+    def _on_acquire(self, wait: float):
+        self.acquired += 1
+        self.wait.add(wait)
+        self.holder_site = _get_call_site()
+        self._acquired_at = time.perf_counter()
+
+    def _on_release(self):
+        self.hold.add(time.perf_counter() - self._acquired_at)
+        self.holder_site = None
+
+_instrumented: "weakref.WeakSet[Lock]" = weakref.WeakSet()
+
+def get_most_contended(n: int = 10) -> list["Lock"]:
+    """
+    Returns up to n instrumented locks with the most total wait time.
+    """
+    return sorted(
+        _instrumented,
+        key=lambda lock: lock.stats.wait.total,  # type: ignore
+        reverse=True,
+    )[:n]
+
+def _get_call_site() -> str | None:
+    # skip frames of this module and of context managers wrapping locks
+    frame = sys._getframe(1)  # noqa: SLF001
+    while frame is not None and frame.f_code.co_filename in (
+        __file__, contextlib.__file__,
+    ):
+        frame = frame.f_back
+    if frame is None:
+        return None
+    code = frame.f_code
+    return f"{code.co_filename}:{frame.f_lineno} in {code.co_name}"
 
 
 class Lock:
-    def __init__(self) -> None:
-        self._evt = asyncio.Event()
-        self._evt.set()
-        self._owner_token: str | None = None
+    """
+    Async lock with FIFO fairness.
+
+    On release, the lock is handed directly to the longest waiting acquirer,
+    so exactly one waiter is woken up. Ownership is proven by int tokens
+    returned from ``acquire``.
+
+    If the lock is instrumented, its ``stats`` collect wait and hold times,
+    waiter counts and the call site of the current holder. Without
+    instrumentation, the only overhead is a check of ``stats`` for None.
+    """
+    def __init__(
+        self,
+        name: str | None = None,
+        *,
+        instrument: bool = False,
+    ) -> None:
+        self._waiters: deque[asyncio.Future[int]] = deque()
+        self._owner_token: int | None = None
+        self._tokens = count(1)
+        self.name = name
+        self.stats: LockStats | None = None
+        if instrument:
+            self.instrument()
+
+    def instrument(self) -> LockStats:
+        """
+        Starts collecting stats of the lock.
+
+        Instrumented locks are listed by ``get_most_contended``.
+        """
+        if self.stats is None:
+            self.stats = LockStats(self.name)
+            _instrumented.add(self)
+        return self.stats
+
+    def count_waiters(self) -> int:
+        return sum(1 for f in self._waiters if not f.done())
 
     async def __aenter__(self):
         await self.acquire()
@@ -17,19 +169,344 @@ class Lock:
         await self.release(self._owner_token)
 
     def is_locked(self) -> bool:
-        return not self._evt.is_set()
+        return self._owner_token is not None
 
-    async def acquire(self) -> str:
-        await self._evt.wait()
-        self._evt.clear()
-        self._owner_token = uuid4()
-        return self._owner_token
+    async def acquire(self) -> int:
+        stats = self.stats
+        if self._owner_token is None:
+            self._owner_token = next(self._tokens)
+            if stats is not None:
+                stats._on_acquire(0.0)  # noqa: SLF001
+            return self._owner_token
 
-    async def release(self, token: str):
+        fut: asyncio.Future[int] = asyncio.get_running_loop().create_future()
+        self._waiters.append(fut)
+        if stats is not None:
+            stats.peak_waiters = max(stats.peak_waiters, len(self._waiters))
+        start = time.perf_counter()
+        try:
+            token = await fut
+        except asyncio.CancelledError:
+            # the lock could be handed right before the cancellation
+            if fut.done() and not fut.cancelled():
+                self._hand_off()
+            raise
+        else:
+            if stats is not None:
+                stats._on_acquire(time.perf_counter() - start)  # noqa: SLF001
+            return token
+
+    async def release(self, token: int):
         if self._owner_token is not None and token != self._owner_token:
             raise ValueError("invalid token to unlock")
-        self._evt.set()
-        self._owner_token = None
+        if self.stats is not None and self._owner_token is not None:
+            self.stats._on_release()  # noqa: SLF001
+        self._hand_off()
 
     async def wait(self):
-        return await self._evt.wait()
+        """
+        Waits until the lock is released.
+
+        Waiting is queued together with acquirers, so it doesn't overtake
+        them.
+        """
+        if self._owner_token is None:
+            return
+        await self.release(await self.acquire())
+
+    def _hand_off(self):
+        while self._waiters:
+            fut = self._waiters.popleft()
+            # skip cancelled waiters
+            if not fut.done():
+                self._owner_token = next(self._tokens)
+                fut.set_result(self._owner_token)
+                return
+        self._owner_token = None
+
+class RWLock:
+    """
+    Async reader-writer lock.
+
+    Any number of readers can hold the lock at once, while a writer holds it
+    exclusively. Waiters are queued in FIFO order, and once a writer is
+    queued, new readers are queued after it, so writers are not starved by
+    a stream of readers.
+
+    A read lock can be upgraded to a write lock. The upgrade waits for other
+    readers to release, and is served before any queued writer. Only one
+    upgrade can be pending at a time, since two readers waiting for each
+    other to upgrade would deadlock.
+
+    Like with ``Lock``, each acquisition returns an int token, which must be
+    passed to the release.
+    """
+    def __init__(self) -> None:
+        self._readers: set[int] = set()
+        self._writer: int | None = None
+        # is write and waiter future
+        self._waiters: deque[tuple[bool, asyncio.Future[int]]] = deque()
+        self._upgrader: asyncio.Future[int] | None = None
+        self._tokens = count(1)
+
+    def is_locked(self) -> bool:
+        return self._writer is not None or bool(self._readers)
+
+    def is_write_locked(self) -> bool:
+        return self._writer is not None
+
+    async def acquire_read(self) -> int:
+        if (
+            self._writer is None
+            and not self._has_upgrader()
+            and not self._has_waiters()
+        ):
+            token = next(self._tokens)
+            self._readers.add(token)
+            return token
+        return await self._wait(False)
+
+    async def acquire_write(self) -> int:
+        if (
+            self._writer is None
+            and not self._readers
+            and not self._has_waiters()
+        ):
+            self._writer = next(self._tokens)
+            return self._writer
+        return await self._wait(True)
+
+    async def release_read(self, token: int):
+        self._release_read(token)
+
+    async def release_write(self, token: int):
+        self._release_write(token)
+
+    async def upgrade(self, token: int) -> int:
+        """
+        Upgrades a read lock to a write lock.
+
+        Returns a new write token, the read token is no longer valid. If the
+        upgrade is cancelled, the read lock is lost as well.
+        """
+        if token not in self._readers:
+            raise ValueError("invalid token to upgrade")
+        if self._has_upgrader():
+            raise ValueError("another upgrade is pending")
+        self._readers.remove(token)
+        if not self._readers:
+            self._writer = next(self._tokens)
+            return self._writer
+
+        fut: asyncio.Future[int] = asyncio.get_running_loop().create_future()
+        self._upgrader = fut
+        try:
+            return await fut
+        except asyncio.CancelledError:
+            if fut.done() and not fut.cancelled():
+                self._release_write(fut.result())
+            else:
+                if self._upgrader is fut:
+                    self._upgrader = None
+                self._wake()
+            raise
+
+    @contextlib.asynccontextmanager
+    async def read(self) -> AsyncIterator[int]:
+        token = await self.acquire_read()
+        try:
+            yield token
+        finally:
+            self._release_read(token)
+
+    @contextlib.asynccontextmanager
+    async def write(self) -> AsyncIterator[int]:
+        token = await self.acquire_write()
+        try:
+            yield token
+        finally:
+            self._release_write(token)
+
+    async def _wait(self, is_write: bool) -> int:
+        fut: asyncio.Future[int] = asyncio.get_running_loop().create_future()
+        self._waiters.append((is_write, fut))
+        try:
+            return await fut
+        except asyncio.CancelledError:
+            # the lock could be handed right before the cancellation
+            if fut.done() and not fut.cancelled():
+                if is_write:
+                    self._release_write(fut.result())
+                else:
+                    self._release_read(fut.result())
+            else:
+                # a cancelled writer could block readers queued after it
+                self._wake()
+            raise
+
+    def _release_read(self, token: int):
+        if token not in self._readers:
+            raise ValueError("invalid token to unlock")
+        self._readers.remove(token)
+        self._wake()
+
+    def _release_write(self, token: int):
+        if token != self._writer:
+            raise ValueError("invalid token to unlock")
+        self._writer = None
+        self._wake()
+
+    def _has_waiters(self) -> bool:
+        while self._waiters and self._waiters[0][1].done():
+            self._waiters.popleft()
+        return bool(self._waiters)
+
+    def _has_upgrader(self) -> bool:
+        # the upgrader could be cancelled before its task got to clean up
+        if self._upgrader is not None and self._upgrader.done():
+            self._upgrader = None
+        return self._upgrader is not None
+
+    def _wake(self):
+        if self._writer is not None:
+            return
+        if self._has_upgrader():
+            assert self._upgrader is not None
+            if not self._readers:
+                fut = self._upgrader
+                self._upgrader = None
+                self._writer = next(self._tokens)
+                fut.set_result(self._writer)
+            return
+
+        while self._has_waiters():
+            is_write, fut = self._waiters[0]
+            if is_write:
+                if not self._readers:
+                    self._waiters.popleft()
+                    self._writer = next(self._tokens)
+                    fut.set_result(self._writer)
+                return
+            self._waiters.popleft()
+            token = next(self._tokens)
+            self._readers.add(token)
+            fut.set_result(token)
+
+class FileLock:
+    """
+    Inter-process lock on a file, with the same interface as ``Lock``.
+
+    Based on ``fcntl.flock``, so available only on Unix. While the file is
+    locked by another process, the lock is polled in non-blocking mode with
+    pauses growing up to ``period`` seconds, so the event loop is never
+    blocked.
+
+    Within a process, a FileLock object is held by one holder at a time, so
+    concurrent shared holders need separate objects.
+
+    Args:
+        path:
+            Path to the lock file. The file is created if it doesn't exist.
+        shared:
+            Whether to acquire the lock in shared mode by default. Any number
+            of processes can hold the lock in shared mode, while the
+            exclusive mode excludes all other holders. Defaults to False.
+        period:
+            Maximum pause in seconds between polls. Defaults to 0.05.
+    """
+    def __init__(
+        self,
+        path: Path | str,
+        *,
+        shared: bool = False,
+        period: float = 0.05,
+    ) -> None:
+        if sys.platform == "win32":
+            raise NotImplementedError("file lock is unavailable on windows")
+        self.path = Path(path)
+        self._shared = shared
+        self._period = period
+        self._local = Lock()
+        self._fd: int | None = None
+        self._owner_token: int | None = None
+        self._acquired_at = 0.0
+        self.last_hold_time: float | None = None
+        """
+        Duration in seconds of the last completed hold.
+        """
+
+    async def __aenter__(self):
+        await self.acquire()
+
+    async def __aexit__(self, *args):
+        assert self._owner_token is not None
+        await self.release(self._owner_token)
+
+    def is_locked(self) -> bool:
+        """
+        Checks whether the lock is held by this object.
+        """
+        return self._owner_token is not None
+
+    def get_hold_time(self) -> float | None:
+        """
+        Returns duration in seconds of the current hold.
+        """
+        if self._owner_token is None:
+            return None
+        return time.perf_counter() - self._acquired_at
+
+    async def acquire(
+        self,
+        timeout: float | None = None,
+        shared: bool | None = None,
+    ) -> int:
+        """
+        Acquires the lock.
+
+        Raises TimeoutError if the lock is not acquired within ``timeout``
+        seconds.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        token = await asyncio.wait_for(self._local.acquire(), timeout)
+        fd = None
+        try:
+            fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+            is_shared = self._shared if shared is None else shared
+            op = (fcntl.LOCK_SH if is_shared else fcntl.LOCK_EX) \
+                | fcntl.LOCK_NB
+            pause = 0.001
+            while True:
+                try:
+                    fcntl.flock(fd, op)
+                    break
+                except BlockingIOError:
+                    if deadline is not None:
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            raise TimeoutError(
+                                f"cannot lock {self.path} within {timeout}s",
+                            ) from None
+                        pause = min(pause, remaining)
+                    await asyncio.sleep(pause)
+                    pause = min(pause * 2, self._period)
+        except BaseException:
+            if fd is not None:
+                os.close(fd)
+            await self._local.release(token)
+            raise
+
+        self._fd = fd
+        self._owner_token = token
+        self._acquired_at = time.perf_counter()
+        return token
+
+    async def release(self, token: int):
+        if token != self._owner_token or self._fd is None:
+            raise ValueError("invalid token to unlock")
+        fcntl.flock(self._fd, fcntl.LOCK_UN)
+        os.close(self._fd)
+        self._fd = None
+        self.last_hold_time = time.perf_counter() - self._acquired_at
+        self._owner_token = None
+        await self._local.release(token)
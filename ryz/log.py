@@ -3,12 +3,13 @@ import tempfile
 import traceback
 import typing
 from pathlib import Path
-from typing import Any, NoReturn
+from typing import Any, Iterable, NoReturn
 
 from aiofile import async_open
 from loguru import logger as _logger
 
 from ryz.obj import get_fqname
+from ryz.traceback import fmt_frames
 from ryz.uuid import uuid4
 
 err_track_dir: Path = Path(tempfile.gettempdir(), "ryz_err_track_dir")
@@ -35,32 +36,100 @@ For debug logs verbosity level is unavailable - they must be emitted
 always for their level.
 """
 
+FwdRecord = tuple[str, str, str, str | None, str | None]
+"""
+Log record forwarded from a child process: tag, level, msg, track path and
+track file content.
+
+Track path and content are set only for records produced by ``track``.
+"""
+_fwd_queue: Any = None
+_fwd_tag: str = ""
+
+def set_fwd(queue: Any, tag: str = ""):
+    """
+    Forwards all further log records to the queue instead of writing them.
+
+    Used in child processes to leave all log I/O to the parent, which
+    receives records from the queue and passes them to ``write_fwd``. Track
+    files are written by the parent as well.
+
+    Pass ``None`` as queue to stop forwarding.
+    """
+    global _fwd_queue, _fwd_tag  # noqa: PLW0603
+    _fwd_queue = queue
+    _fwd_tag = tag
+
+def _fwd(
+    level: str,
+    msg: Any,
+    track_path: Path | None = None,
+    track_content: str | None = None,
+):
+    _fwd_queue.put((
+        _fwd_tag,
+        level,
+        str(msg),
+        str(track_path) if track_path else None,
+        track_content,
+    ))
+
+def write_fwd(records: Iterable[FwdRecord]):
+    """
+    Writes a batch of records forwarded from child processes.
+
+    Each msg is prefixed with the child's tag.
+    """
+    for tag, level, msg, track_path, track_content in records:
+        if track_path is not None:
+            path = Path(track_path)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            with path.open("w+") as f:
+                f.write(track_content or "")
+        _logger.log(level, f"[{tag}] {msg}")
+
 def debug(*args, sep: str = ", "):
     if is_debug:
-        _logger.debug(sep.join([str(arg) for arg in args]))
+        msg = sep.join([str(arg) for arg in args])
+        if _fwd_queue is not None:
+            _fwd("DEBUG", msg)
+            return
+        _logger.debug(msg)
 
 def info(msg: Any, v: int = 1):
     if v < 1:
         return
     if std_verbosity >= v:
+        if _fwd_queue is not None:
+            _fwd("INFO", msg)
+            return
         _logger.info(msg)
 
 def warn(msg: Any, v: int = 1):
     if v < 1:
         return
     if std_verbosity >= v:
+        if _fwd_queue is not None:
+            _fwd("WARNING", msg)
+            return
         _logger.warning(msg)
 
 def err(msg: Any, v: int = 1):
     if v < 1:
         return
     if std_verbosity >= v:
+        if _fwd_queue is not None:
+            _fwd("ERROR", msg)
+            return
         _logger.error(msg)
 
 def catch(err: Exception, v: int = 1):
     if v < 1:
         return
     if std_verbosity >= v:
+        if _fwd_queue is not None:
+            _fwd("ERROR", "".join(traceback.format_exception(err)).strip())
+            return
         _logger.exception(err)
 
 def err_or_catch(
@@ -87,6 +156,9 @@ def _try_get_err_traceback_str(err: Exception) -> str | None:
         for item in traceback.StackSummary.from_list(
                 extracted_list).format():
             s += item
+    elif getattr(err, "frames", None):
+        # errs received from other processes carry frame records instead
+        s = fmt_frames(err.frames)  # type: ignore
     return s
 
 def _get_track_data(
@@ -95,7 +167,6 @@ def _get_track_data(
     v: int = 1,
 ) -> tuple[str, Path, str, str]:
     msg = str(msg)
-    err_track_dir.mkdir(parents=True, exist_ok=True)
     sid = uuid4()
     track_path = Path(err_track_dir, f"{sid}.log")
 
@@ -144,7 +215,11 @@ def track(
 
     sid, track_path, file_content, final_msg = _get_track_data(
         err_, msg, v)
+    if _fwd_queue is not None:
+        _fwd("ERROR", final_msg, track_path, file_content)
+        return sid
 
+    err_track_dir.mkdir(parents=True, exist_ok=True)
     with track_path.open("w+") as f:
         f.write(file_content)
     err(final_msg, v)
@@ -164,7 +239,11 @@ async def atrack(
     sid, track_path, file_content, final_msg = _get_track_data(
         err_, msg, v,
     )
+    if _fwd_queue is not None:
+        _fwd("ERROR", final_msg, track_path, file_content)
+        return sid
 
+    err_track_dir.mkdir(parents=True, exist_ok=True)
     async with async_open(track_path, "w+") as f:
         await f.write(file_content)
     err(final_msg, v)
@@ -0,0 +1,273 @@
+"""
+Async pools of values managed by keepers.
+"""
+import asyncio
+import contextlib
+import math
+import time
+from collections import deque
+from typing import Any, AsyncIterator, Awaitable, Callable, Generic
+
+from pydantic import BaseModel
+
+from ryz import log
+from ryz.core import Err, Ok, Res, ecode
+from ryz.keeper import Keeper
+from ryz.types import T
+
+
+class PoolMetrics(BaseModel):
+    acquired: int
+    timeouts: int
+    reclaimed: int
+    in_use: int
+    peak_in_use: int
+    waiting: int
+    wait_total: float
+    wait_max: float
+    utilization: float | None
+    """
+    Share of values in use, available only if the pool capacity is known.
+    """
+
+class Pool(Generic[T]):
+    """
+    Gives values of a keeper to async users, waiting for freed values if
+    the keeper is exhausted.
+
+    Waiters are served in FIFO order: a released value is handed directly to
+    the longest waiting user, without returning to the keeper.
+
+    Args:
+        keeper:
+            Keeper to receive values from. Values must be hashable.
+        capacity:
+            Total number of keeper values, used to report utilization.
+        factory:
+            Creates a resource for a value, e.g. a connection for a slot id,
+            the first time the value is given. Resources are available via
+            ``get_resource``.
+        check:
+            Checks the value's resource before giving the value. If the check
+            fails, the resource is recreated by the factory.
+        tick:
+            Precision in seconds of lease TTLs.
+        wheel_size:
+            Number of slots in the timing wheel tracking lease TTLs.
+    """
+    def __init__(  # noqa: PLR0913
+        self,
+        keeper: Keeper[T],
+        *,
+        capacity: int | None = None,
+        factory: Callable[[T], Awaitable[Any]] | None = None,
+        check: Callable[[Any], Awaitable[bool]] | None = None,
+        tick: float = 1.0,
+        wheel_size: int = 64,
+    ) -> None:
+        self._keeper = keeper
+        self._capacity = capacity
+        self._factory = factory
+        self._check = check
+        self._waiters: deque[asyncio.Future[T]] = deque()
+        self._in_use: set[T] = set()
+        self._resources: dict[T, Any] = {}
+        # incremented on each acquisition to tell apart leases of the same
+        # value
+        self._gens: dict[T, int] = {}
+
+        self._tick = tick
+        self._wheel: list[set[T]] = [set() for _ in range(wheel_size)]
+        self._wheel_pos = 0
+        # value => slot and number of wheel rounds left before expiration
+        self._expiry: dict[T, tuple[int, int]] = {}
+        self._wheel_task: asyncio.Task | None = None
+
+        self._acquired = 0
+        self._timeouts = 0
+        self._reclaimed = 0
+        self._peak_in_use = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+
+    async def acquire(
+        self,
+        timeout: float | None = None,
+        ttl: float | None = None,
+    ) -> Res[T]:
+        """
+        Acquires a value, waiting for it to be released if necessary.
+
+        Args:
+            timeout:
+                Seconds to wait for a value. Returns ``ecode.Timeout`` err
+                if no value is released in time. Defaults to None, which is
+                waiting forever.
+            ttl:
+                Seconds after which the value is released automatically.
+                Defaults to None, which is never.
+        """
+        start = time.monotonic()
+        val_res = Err("waiters are queued") if self._has_waiters() \
+            else self._keeper.recv()
+        if isinstance(val_res, Err):
+            fut: asyncio.Future[T] = \
+                asyncio.get_running_loop().create_future()
+            self._waiters.append(fut)
+            try:
+                val = await asyncio.wait_for(fut, timeout)
+            except TimeoutError:
+                self._timeouts += 1
+                return Err(f"no value within {timeout}s", ecode.Timeout)
+            except BaseException:
+                # the value could be handed right before the cancellation
+                if fut.done() and not fut.cancelled():
+                    self._in_use.discard(fut.result())
+                    self._put_back(fut.result())
+                raise
+        else:
+            val = val_res.ok
+        self._in_use.add(val)
+
+        wait = time.monotonic() - start
+        self._wait_total += wait
+        self._wait_max = max(self._wait_max, wait)
+        self._acquired += 1
+        self._peak_in_use = max(self._peak_in_use, len(self._in_use))
+        self._gens[val] = self._gens.get(val, 0) + 1
+
+        try:
+            prepare_res = await self._prepare(val)
+        except BaseException:
+            # the caller could be cancelled while the resource is created
+            self.release(val).unwrap()
+            raise
+        if isinstance(prepare_res, Err):
+            self.release(val).unwrap()
+            return prepare_res
+        if ttl is not None:
+            self._schedule(val, ttl)
+        return Ok(val)
+
+    def release(self, val: T) -> Res[None]:
+        """
+        Releases a value, handing it to the first waiter if there is any.
+        """
+        if val not in self._in_use:
+            return Err(f"val {val} is not in use", ecode.NotFound)
+        self._in_use.remove(val)
+        self._unschedule(val)
+        self._put_back(val)
+        return Ok(None)
+
+    @contextlib.asynccontextmanager
+    async def lease(
+        self,
+        timeout: float | None = None,
+        ttl: float | None = None,
+    ) -> AsyncIterator[T]:
+        """
+        Acquires a value for the block and releases it on exit.
+
+        Raises acquisition err. If the lease has expired by TTL, the value
+        is not released on exit, since it could be given to another user.
+        """
+        val = (await self.acquire(timeout, ttl)).unwrap()
+        gen = self._gens[val]
+        try:
+            yield val
+        finally:
+            if self._gens.get(val) == gen:
+                self.release(val).ignore()
+
+    def get_resource(self, val: T) -> Res[Any]:
+        if val not in self._resources:
+            return Err(f"resource for val {val}", ecode.NotFound)
+        return Ok(self._resources[val])
+
+    def metrics(self) -> PoolMetrics:
+        utilization = None
+        if self._capacity:
+            utilization = len(self._in_use) / self._capacity
+        return PoolMetrics(
+            acquired=self._acquired,
+            timeouts=self._timeouts,
+            reclaimed=self._reclaimed,
+            in_use=len(self._in_use),
+            peak_in_use=self._peak_in_use,
+            waiting=sum(1 for f in self._waiters if not f.done()),
+            wait_total=self._wait_total,
+            wait_max=self._wait_max,
+            utilization=utilization,
+        )
+
+    def close(self):
+        """
+        Stops TTL tracking and cancels all waiters.
+        """
+        if self._wheel_task is not None:
+            self._wheel_task.cancel()
+            self._wheel_task = None
+        while self._waiters:
+            self._waiters.popleft().cancel()
+
+    def _has_waiters(self) -> bool:
+        while self._waiters and self._waiters[0].done():
+            self._waiters.popleft()
+        return bool(self._waiters)
+
+    def _put_back(self, val: T):
+        while self._waiters:
+            fut = self._waiters.popleft()
+            if fut.done():
+                continue
+            self._in_use.add(val)
+            fut.set_result(val)
+            return
+        self._keeper.free(val).unwrap()
+
+    async def _prepare(self, val: T) -> Res[None]:
+        if self._factory is None:
+            return Ok(None)
+        try:
+            if (
+                val in self._resources
+                and (
+                    self._check is None
+                    or await self._check(self._resources[val])
+                )
+            ):
+                return Ok(None)
+            self._resources[val] = await self._factory(val)
+        except Exception as err:
+            return Err.from_native(err)
+        return Ok(None)
+
+    def _schedule(self, val: T, ttl: float):
+        size = len(self._wheel)
+        ticks = max(1, math.ceil(ttl / self._tick))
+        slot = (self._wheel_pos + ticks) % size
+        self._wheel[slot].add(val)
+        self._expiry[val] = (slot, (ticks - 1) // size)
+        if self._wheel_task is None:
+            self._wheel_task = asyncio.create_task(self._turn_wheel())
+
+    def _unschedule(self, val: T):
+        expiry = self._expiry.pop(val, None)
+        if expiry is not None:
+            self._wheel[expiry[0]].discard(val)
+
+    async def _turn_wheel(self):
+        while self._expiry:
+            await asyncio.sleep(self._tick)
+            self._wheel_pos = (self._wheel_pos + 1) % len(self._wheel)
+            for val in list(self._wheel[self._wheel_pos]):
+                slot, rounds = self._expiry[val]
+                if rounds > 0:
+                    self._expiry[val] = (slot, rounds - 1)
+                    continue
+                log.warn(f"lease of val {val} has expired => reclaim")
+                self._reclaimed += 1
+                self._gens[val] += 1
+                self.release(val).unwrap()
+        self._wheel_task = None
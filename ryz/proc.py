@@ -1,7 +1,13 @@
 import asyncio
+import os
+import queue
 import sys
-from multiprocessing import Pipe, Process
-from typing import Any, Literal, Protocol
+import threading
+import time
+import weakref
+from multiprocessing import Pipe, Process, Queue
+from multiprocessing.connection import wait as wait_conns
+from typing import Any, Iterable, Literal, Protocol
 
 from ryz import log
 from ryz.core import Err, Ok, Res, ecode
@@ -15,6 +21,43 @@ else:
 class ProcTarget(Protocol):
     def __call__(self, **kwargs: Any) -> Any: ...
 
+def _run_fwd_target(
+    pipe: PipeConn,
+    target: ProcTarget,
+    log_queue: Queue,
+    key: str | None,
+    **kwargs: Any,
+) -> Any:
+    log.set_fwd(log_queue, f"{key or '-'}:{os.getpid()}")
+    return target(pipe, **kwargs)  # type: ignore
+
+def _listen_logs(log_queue: Queue, batch_size: int):
+    while True:
+        rec = log_queue.get()
+        batch: list[log.FwdRecord] = []
+        is_stopped = False
+        while rec is not None:
+            batch.append(rec)
+            if len(batch) >= batch_size:
+                break
+            try:
+                rec = log_queue.get_nowait()
+            except queue.Empty:
+                break
+        else:
+            is_stopped = True
+        _write_fwd_batch(batch)
+        if is_stopped:
+            return
+
+def _write_fwd_batch(batch: list[log.FwdRecord]):
+    # the listener must keep draining the queue, so a failed batch is only
+    # reported
+    try:
+        log.write_fwd(batch)
+    except Exception as err:
+        log.err(f"cannot write {len(batch)} forwarded log records: {err!r}")
+
 class ProcGroup:
     """
     Organizes processes.
@@ -24,14 +67,59 @@ class ProcGroup:
     Args:
         max_procs:
             Maximum processes to handle. Defaults to -1, which is unlimited.
+        fwd_logs:
+            Whether regd processes should forward their log records and
+            track files to this process instead of writing them on their own.
+            Records are received by a listener thread in batches of up to
+            ``fwd_logs_batch`` records and written to this process's sink,
+            tagged with the child's key and pid. The listener is stopped
+            by ``stop_fwd_logs`` or once the group is garbage collected.
+            Defaults to False.
     """
 
-    def __init__(self, max_procs: int = -1) -> None:
+    def __init__(
+        self,
+        max_procs: int = -1,
+        *,
+        fwd_logs: bool = False,
+        fwd_logs_batch: int = 256,
+    ) -> None:
         self._procs: dict[int, tuple[Process, PipeConn]] = {}
         self._key_to_pid: dict[str, int] = {}
         self._max_procs = max_procs
         self.proc_dereg_method: Literal["kill", "terminate"] = "terminate"
 
+        self._log_queue: Queue | None = None
+        self._log_thread: threading.Thread | None = None
+        self._log_finalizer: weakref.finalize | None = None
+        if fwd_logs:
+            self._log_queue = Queue()
+            # the listener doesn't reference the group, so the group can be
+            # collected, which stops the listener
+            self._log_thread = threading.Thread(
+                target=_listen_logs,
+                args=(self._log_queue, fwd_logs_batch),
+                daemon=True)
+            self._log_thread.start()
+            self._log_finalizer = weakref.finalize(
+                self, self._log_queue.put, None)
+
+    def stop_fwd_logs(self, timeout: float | None = None):
+        """
+        Writes all already forwarded log records and stops the listener.
+
+        Records forwarded by children after the stop are not written.
+        Children regd after the stop log by themselves.
+        """
+        if self._log_finalizer is None or self._log_thread is None:
+            return
+        # puts the stop sentinel, and is not called again on collection
+        self._log_finalizer()
+        self._log_thread.join(timeout)
+        self._log_thread = None
+        self._log_queue = None
+        self._log_finalizer = None
+
     def has(self, pid: int) -> bool:
         return pid in self._procs
 
@@ -60,11 +148,20 @@ class ProcGroup:
                 f" limit {self._max_procs} is exceeded")
 
         parent_pipe, child_pipe = Pipe()
-        proc = Process(
-            target=target,
-            args=(child_pipe,),
-            kwargs=proc_kwargs if proc_kwargs else {})
+        if self._log_queue is not None:
+            proc = Process(
+                target=_run_fwd_target,
+                args=(child_pipe, target, self._log_queue, key),
+                kwargs=proc_kwargs if proc_kwargs else {})
+        else:
+            proc = Process(
+                target=target,
+                args=(child_pipe,),
+                kwargs=proc_kwargs if proc_kwargs else {})
         proc.start()
+        # the child's end is only needed in the child, and once closed here,
+        # child exit is seen as eof by the parent's end
+        child_pipe.close()
 
         if proc.pid is None:
             return Err(
@@ -178,6 +275,115 @@ class ProcGroup:
         pid = pid_res.unwrap()
         return self.send(pid, data)
 
+    def broadcast(self, data: Any) -> dict[str, Res[None]]:
+        """
+        Sends the same data to every keyed process.
+
+        Processes regd without a key are skipped.
+        """
+        return {
+            key: self.send_key(key, data) for key in list(self._key_to_pid)
+        }
+
+    def scatter(self, items: dict[str, Any]) -> dict[str, Res[None]]:
+        """
+        Sends each item to the process with the item's key.
+        """
+        return {key: self.send_key(key, item) for key, item in items.items()}
+
+    def gather(
+        self,
+        timeout: float | None = None,
+        keys: Iterable[str] | None = None,
+    ) -> dict[str, Res[Any]]:
+        """
+        Receives one msg from each of the keyed processes.
+
+        Msgs are received in the order they become ready, not in the order of
+        keys, so a slow process doesn't delay receiving from the others.
+
+        Args:
+            timeout:
+                Seconds to wait for all msgs. Processes not replied in time
+                get ``ecode.Timeout`` err. Defaults to None, which is
+                waiting forever.
+            keys:
+                Keys of processes to receive from. Defaults to all keyed
+                processes.
+        """
+        results, pending = self._prepare_gather(keys)
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while pending:
+            remaining = None
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+            for conn in wait_conns(list(pending), remaining):
+                key = pending.pop(conn)  # type: ignore
+                results[key] = self._recv_conn(conn)  # type: ignore
+        return self._finish_gather(results, pending)
+
+    async def async_gather(
+        self,
+        timeout: float | None = None,
+        keys: Iterable[str] | None = None,
+        period: float = 1.0,
+    ) -> dict[str, Res[Any]]:
+        """
+        Same as gather(), but async.
+
+        Waiting for ready pipes happens in a thread, which is woken up at
+        least each "period" seconds to let the task be cancelled.
+        """
+        results, pending = self._prepare_gather(keys)
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while pending:
+            wait_time = period
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                wait_time = min(remaining, period)
+            ready = await asyncio.to_thread(
+                wait_conns, list(pending), wait_time)
+            for conn in ready:
+                key = pending.pop(conn)  # type: ignore
+                results[key] = self._recv_conn(conn)  # type: ignore
+        return self._finish_gather(results, pending)
+
+    def _prepare_gather(
+        self,
+        keys: Iterable[str] | None,
+    ) -> tuple[dict[str, Res[Any]], dict[PipeConn, str]]:
+        results: dict[str, Res[Any]] = {}
+        pending: dict[PipeConn, str] = {}
+        for key in list(self._key_to_pid) if keys is None else keys:
+            pid_res = self.get_pid_by_key(key)
+            if isinstance(pid_res, Err):
+                results[key] = pid_res
+                continue
+            # exited processes are not checked, since their msgs can still
+            # be in the pipe - otherwise recv from them returns an err
+            _, pipe = self._procs[pid_res.ok]
+            pending[pipe] = key
+        return results, pending
+
+    def _finish_gather(
+        self,
+        results: dict[str, Res[Any]],
+        pending: dict[PipeConn, str],
+    ) -> dict[str, Res[Any]]:
+        for key in pending.values():
+            results[key] = Err(f"recv from key {key}", ecode.Timeout)
+        return results
+
+    def _recv_conn(self, conn: PipeConn) -> Res[Any]:
+        try:
+            return Ok(conn.recv())
+        except (EOFError, OSError) as err:
+            return Err.from_native(err)
+
     def _get_proc(self, pid: int) -> Res[tuple[Process, PipeConn]]:
         if not self.has(pid):
             return Err(f"proc with pid {pid}", ecode.NotFound)
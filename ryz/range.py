@@ -1,4 +1,7 @@
-from typing import Generic, Iterable, TypeVar
+from array import array
+from bisect import bisect_left, bisect_right
+from heapq import merge
+from typing import Generic, Iterable, Iterator, Self, Sequence, TypeVar
 
 T = TypeVar("T")
 class Range(Generic[T]):
@@ -16,3 +19,152 @@ class Range(Generic[T]):
 
     def contains(self, val: T) -> bool:
         return self.min <= val and val <= self.max  # type: ignore
+
+class IntervalSet:
+    """
+    Set of ints stored as sorted disjoint inclusive intervals.
+
+    Overlapping and adjacent intervals are merged on insert. Interval bounds
+    are kept in two int64 arrays, so each interval takes 16 bytes.
+    Membership checks are O(log n), set operations are linear in the number
+    of intervals of both sets.
+    """
+    def __init__(self, ranges: Iterable[Range[int]] = ()) -> None:
+        self._mins = array("q")
+        self._maxs = array("q")
+        _extend_sorted(
+            self._mins,
+            self._maxs,
+            sorted((r.min, r.max) for r in ranges),
+        )
+
+    @classmethod
+    def _from_sorted(cls, pairs: Iterable[tuple[int, int]]) -> Self:
+        s = cls()
+        _extend_sorted(*s.get_bounds(), pairs)
+        return s
+
+    def get_bounds(self) -> tuple[array, array]:
+        """
+        Gets arrays of interval mins and maxs, which must not be modified.
+        """
+        return self._mins, self._maxs
+
+    def iter_pairs(self) -> Iterator[tuple[int, int]]:
+        """
+        Iterates min and max of each interval.
+        """
+        return zip(self._mins, self._maxs, strict=True)
+
+    def __len__(self) -> int:
+        return len(self._mins)
+
+    def __iter__(self) -> Iterator[Range[int]]:
+        for min_, max_ in self.iter_pairs():
+            yield Range(min_, max_)
+
+    def __eq__(self, other: object) -> bool:
+        return (
+            isinstance(other, IntervalSet)
+            and self.get_bounds() == other.get_bounds()
+        )
+
+    def __repr__(self) -> str:
+        return f"IntervalSet({list(self.iter_pairs())})"
+
+    def add(self, range_: Range[int]):
+        """
+        Adds a range, merging it with overlapping and adjacent intervals.
+        """
+        min_, max_ = range_.min, range_.max
+        if min_ > max_:
+            return
+        # intervals [i, j) overlap or touch the new one
+        i = bisect_left(self._maxs, min_ - 1)
+        j = bisect_right(self._mins, max_ + 1)
+        if i < j:
+            min_ = min(min_, self._mins[i])
+            max_ = max(max_, self._maxs[j - 1])
+        self._mins[i:j] = array("q", (min_,))
+        self._maxs[i:j] = array("q", (max_,))
+
+    def contains(self, val: int) -> bool:
+        i = bisect_right(self._mins, val) - 1
+        return i >= 0 and val <= self._maxs[i]
+
+    def contains_many(self, vals: Sequence[int]) -> list[bool]:
+        """
+        Checks membership of many sorted vals in a single pass.
+        """
+        result: list[bool] = []
+        mins = self._mins
+        maxs = self._maxs
+        i = 0
+        n = len(mins)
+        for val in vals:
+            while i < n and maxs[i] < val:
+                i += 1
+            result.append(i < n and mins[i] <= val)
+        return result
+
+    def union(self, other: "IntervalSet") -> "IntervalSet":
+        return IntervalSet._from_sorted(
+            merge(self.iter_pairs(), other.iter_pairs()))
+
+    def intersection(self, other: "IntervalSet") -> "IntervalSet":
+        omins, omaxs = other.get_bounds()
+
+        def gen() -> Iterator[tuple[int, int]]:
+            i = j = 0
+            while i < len(self) and j < len(other):
+                min_ = max(self._mins[i], omins[j])
+                max_ = min(self._maxs[i], omaxs[j])
+                if min_ <= max_:
+                    yield min_, max_
+                if self._maxs[i] < omaxs[j]:
+                    i += 1
+                else:
+                    j += 1
+
+        return IntervalSet._from_sorted(gen())
+
+    def difference(self, other: "IntervalSet") -> "IntervalSet":
+        omins, omaxs = other.get_bounds()
+
+        def gen() -> Iterator[tuple[int, int]]:
+            j = 0
+            for min_, max_ in self.iter_pairs():
+                # skip subtracted intervals lying fully before this one
+                while j < len(other) and omaxs[j] < min_:
+                    j += 1
+                # start of the part not subtracted yet
+                lo = min_
+                k = j
+                while k < len(other) and omins[k] <= max_:
+                    if omins[k] > lo:
+                        yield lo, omins[k] - 1
+                    lo = max(lo, omaxs[k] + 1)
+                    k += 1
+                if lo <= max_:
+                    yield lo, max_
+
+        return IntervalSet._from_sorted(gen())
+
+def _extend_sorted(
+    mins: array,
+    maxs: array,
+    pairs: Iterable[tuple[int, int]],
+):
+    """
+    Appends intervals sorted by min to bounds, merging overlapping and
+    adjacent ones.
+    """
+    for min_, max_ in pairs:
+        if min_ > max_:
+            continue
+        if maxs and min_ <= maxs[-1] + 1:
+            if max_ > maxs[-1]:
+                maxs[-1] = max_
+            continue
+        mins.append(min_)
+        maxs.append(max_)
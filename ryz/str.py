@@ -1,7 +1,24 @@
 import re
-from typing import Any
+import string
+import time
+from typing import IO, Any, Iterable, Iterator, Literal
+
+from pydantic import BaseModel
 
 from ryz.cls import Static
+from ryz.core import panic
+
+_CYRILLIC_RE = re.compile("[а-яА-Я]")
+# the same range in UTF-8
+_CYRILLIC_BYTES_RE = re.compile(rb"\xd0[\x90-\xbf]|\xd1[\x80-\x8f]")
+_NON_ALPHA_RE = re.compile("[^a-zA-Z]")
+_NON_ALNUM_RE = re.compile("[^a-zA-Z0-9]")
+
+StrFilter = Literal["alpha", "alnum"]
+_FILTER_CHARS: dict[StrFilter, str] = {
+    "alpha": string.ascii_letters,
+    "alnum": string.ascii_letters + string.digits,
+}
 
 
 class StringUtils(Static):
@@ -33,7 +50,7 @@ class StringUtils(Static):
         """
         Checks if text contains any Cyrillic characters.
         """
-        return bool(re.search("[а-яА-Я]", text))
+        return _CYRILLIC_RE.search(text) is not None
 
     @staticmethod
     def remove_non_alpha(s: str) -> str:
@@ -41,8 +58,7 @@ class StringUtils(Static):
         Remove all non-alpha characters from string.
         """
         # https://stackoverflow.com/a/22521156
-        regex = re.compile("[^a-zA-Z]")
-        return regex.sub("", s)
+        return _NON_ALPHA_RE.sub("", s)
 
     @staticmethod
     def remove_non_alnum(s: str) -> str:
@@ -50,5 +66,137 @@ class StringUtils(Static):
         Remove all non-alpha characters from string.
         """
         # https://stackoverflow.com/a/22521156
-        regex = re.compile("[^a-zA-Z0-9]")
-        return regex.sub("", s)
+        return _NON_ALNUM_RE.sub("", s)
+
+
+class SanitizeStats(BaseModel):
+    in_size: int = 0
+    """
+    Number of processed chars or bytes.
+    """
+    out_size: int = 0
+    seconds: float = 0.0
+    """
+    Time spent on processing, without time of reading and writing.
+    """
+    has_cyrillic: bool = False
+
+    def get_mb_per_sec(self) -> float:
+        if self.seconds == 0:
+            return 0.0
+        return self.in_size / self.seconds / 1_000_000
+
+
+class StrSanitizer:
+    """
+    Removes chars from text by several filters in one pass.
+
+    Each filter allows a set of ASCII chars, and only chars allowed by all
+    filters are kept. Text is processed as UTF-8 bytes by a precomputed
+    deletion table, and bytes are processed without decoding.
+
+    Args:
+        filters:
+            Filters to apply, "alpha" is the same as
+            ``StringUtils.remove_non_alpha`` and "alnum" is the same as
+            ``StringUtils.remove_non_alnum``.
+        detect_cyrillic:
+            Whether to check processed text for Cyrillic chars, the same as
+            ``StringUtils.has_cyrillic``, and set ``stats.has_cyrillic``.
+    """
+    def __init__(
+        self,
+        filters: Iterable[StrFilter] = ("alnum",),
+        *,
+        detect_cyrillic: bool = False,
+    ) -> None:
+        allowed: set[str] | None = None
+        for f in filters:
+            chars = set(_FILTER_CHARS[f])
+            allowed = chars if allowed is None else allowed & chars
+        if allowed is None:
+            panic("at least one filter")
+        # bytes to delete from UTF-8 text, which includes all bytes of
+        # non-ASCII chars, since allowed chars are ASCII
+        self._delete = bytes(b for b in range(256) if chr(b) not in allowed)
+        # newline kept, to process many strs joined by it
+        self._joined_delete = self._delete.replace(b"\n", b"")
+        self._detect_cyrillic = detect_cyrillic
+        self.stats = SanitizeStats()
+
+    def reset_stats(self):
+        self.stats = SanitizeStats()
+
+    def sanitize(self, text: str) -> str:
+        return self._process(text)
+
+    def sanitize_many(self, texts: list[str]) -> list[str]:
+        """
+        Sanitizes many strs at once, by joining them if they have no
+        newlines.
+        """
+        joined = "\n".join(texts)
+        if joined.count("\n") != len(texts) - 1 or not texts:
+            return [self._process(text) for text in texts]
+        start = time.perf_counter()
+        if self._detect_cyrillic and not self.stats.has_cyrillic:
+            self.stats.has_cyrillic = _CYRILLIC_RE.search(joined) is not None
+        f = joined.encode().translate(None, self._joined_delete) \
+            .decode("ascii").split("\n")
+        self.stats.seconds += time.perf_counter() - start
+        self.stats.in_size += len(joined) - len(texts) + 1
+        self.stats.out_size += sum(map(len, f))
+        return f
+
+    def sanitize_iter(
+        self,
+        texts: Iterable[str | bytes],
+    ) -> Iterator[str | bytes]:
+        """
+        Sanitizes each text of an iterable, e.g. lines or chunks of a file.
+
+        Since filters work char by char, texts can be split anywhere.
+        """
+        last_byte = b""
+        for text in texts:
+            if isinstance(text, bytes):
+                # a Cyrillic char can be split between chunks
+                if (
+                    self._detect_cyrillic
+                    and last_byte
+                    and _CYRILLIC_BYTES_RE.match(last_byte + text[:1])
+                ):
+                    self.stats.has_cyrillic = True
+                last_byte = text[-1:]
+            yield self._process(text)
+
+    def sanitize_file(
+        self,
+        src: IO,
+        dst: IO,
+        chunk_size: int = 1 << 20,
+    ):
+        """
+        Writes sanitized content of a file to another file, by chunks.
+
+        Files must be both binary or both text.
+        """
+        chunks = iter(lambda: src.read(chunk_size), src.read(0))
+        dst.writelines(self.sanitize_iter(chunks))
+
+    def _process(self, text: str | bytes) -> Any:
+        start = time.perf_counter()
+        if isinstance(text, bytes):
+            if self._detect_cyrillic and not self.stats.has_cyrillic:
+                self.stats.has_cyrillic = \
+                    _CYRILLIC_BYTES_RE.search(text) is not None
+            f = text.translate(None, self._delete)
+        else:
+            if self._detect_cyrillic and not self.stats.has_cyrillic:
+                self.stats.has_cyrillic = \
+                    _CYRILLIC_RE.search(text) is not None
+            f = text.encode().translate(None, self._delete).decode("ascii")
+        self.stats.seconds += time.perf_counter() - start
+        self.stats.in_size += len(text)
+        self.stats.out_size += len(f)
+        return f
@@ -2,27 +2,159 @@
 Transaction handling aka THD.
 """
 
+import asyncio
+import contextlib
 import inspect
 import typing
-from typing import Any, Awaitable, Callable, Coroutine, Self
+from typing import (
+    Any,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Coroutine,
+    Generic,
+    Literal,
+    Self,
+)
 
 from ryz import log
-from ryz.core import Err, panic
+from ryz.core import Err, Ok, Res, panic
 from ryz.types import T
 
-_RollbackFnAndPreResult = tuple[
-    Callable[[Any], Awaitable[None] | None],
-    Any,
-]
+_RollbackFn = Callable[[Any], Awaitable[None] | None]
+_RollbackFnAndPreResult = tuple[_RollbackFn, Any, bool]
+
+ThdMode = Literal["standard", "defer"]
+"""
+Modes of thd operations execution:
+    standard:
+        Operations are executed right away.
+    defer:
+        Operations are queued and executed only on commit, i.e. when the
+        thd block is exited without an err.
+"""
+
+BulkFn = Callable[[list[Any]], Awaitable[list | None] | list | None]
+"""
+Executes many deferred operations of the same kind in a single call, e.g.
+``delete_many``.
+
+Accepts items of all operations of the kind and optionally returns results
+for each item in the same order.
+"""
+
+class Deferred(Generic[T]):
+    """
+    Result of an operation deferred until thd commit.
+    """
+    def __init__(self) -> None:
+        self._is_done = False
+        self._val: T | None = None
+
+    def is_done(self) -> bool:
+        return self._is_done
+
+    def get(self) -> Res[T]:
+        if not self._is_done:
+            return Err("deferred operation is not executed yet")
+        return Ok(typing.cast(T, self._val))
+
+    def set(self, val: T):
+        """
+        Sets the result, called by the thd on commit.
+        """
+        self._val = val
+        self._is_done = True
+
+class _Journal:
+    """
+    Rollback stack stored as parallel arrays of rollback fns, their
+    preresults and independence flags.
+    """
+    __slots__ = ("fns", "preresults", "flags")
+
+    def __init__(self) -> None:
+        self.fns: list[_RollbackFn] = []
+        self.preresults: list[Any] = []
+        self.flags = bytearray()
+
+    def __len__(self) -> int:
+        return len(self.fns)
+
+    def push(self, fn: _RollbackFn, preresult: Any, is_independent: bool):
+        self.fns.append(fn)
+        self.preresults.append(preresult)
+        self.flags.append(is_independent)
+
+    def pop(self) -> _RollbackFnAndPreResult:
+        return (self.fns.pop(), self.preresults.pop(), bool(self.flags.pop()))
+
+    def is_last_independent(self, mark: int = 0) -> bool:
+        return len(self.fns) > mark and bool(self.flags[-1])
+
+class _DeferredOp:
+    __slots__ = (
+        "fn",
+        "rollback_fn",
+        "kind",
+        "item",
+        "is_independent",
+        "pick",
+        "deferred",
+    )
+
+    def __init__(  # noqa: PLR0913
+        self,
+        fn: Callable[[], Any] | None,
+        rollback_fn: Callable[[Any], Any] | None,
+        *,
+        kind: str | None = None,
+        item: Any = None,
+        is_independent: bool = False,
+        pick: Callable[[Any], Any] | None = None,
+    ) -> None:
+        self.fn = fn
+        self.rollback_fn = rollback_fn
+        self.kind = kind
+        self.item = item
+        self.is_independent = is_independent
+        self.pick = pick
+        self.deferred: Deferred = Deferred()
 
 class Thd:
-    # TODO:
-    #       maybe add modes:
-    #           "standard" => execute right away,
-    #           "defer" => execute only on commit
-    def __init__(self):
+    """
+    Transaction of operations with registered rollbacks.
+
+    On err, all registered rollbacks are executed in reverse order. Adjacent
+    rollbacks of operations marked as independent are executed concurrently,
+    with at most ``max_concurrency`` of them at once. Rollback errs don't
+    stop the rollback, they are collected into ``rollback_err``.
+
+    Savepoints created with ``savepoint`` roll back only operations
+    registered inside them. Rollbacks are kept in a compact journal, which
+    holds operation results only as much as rollbacks need them - pass
+    ``pick`` to keep only a part of the result, e.g. an id.
+
+    In "defer" mode, operations are registered with ``d`` and ``d_bulk``
+    instead of ``a`` and ``aa``. On commit, independent operations placed
+    between two dependent ones are executed concurrently, with at most
+    ``max_concurrency`` of them at once, and bulk operations of the same kind
+    among them are merged into a single call of the kind's bulk fn.
+    """
+    def __init__(
+        self,
+        mode: ThdMode = "standard",
+        *,
+        max_concurrency: int = 8,
+        bulk_fns: dict[str, BulkFn] | None = None,
+    ):
+        self._mode = mode
+        self._max_concurrency = max_concurrency
+        self._bulk_fns = bulk_fns if bulk_fns else {}
         self._is_queue_locked = False
-        self._rollback_stack: list[_RollbackFnAndPreResult] = []
+        self._journal = _Journal()
+        self._ops: list[_DeferredOp] = []
+        self.rollback_err: Err | None = None
 
     async def __aenter__(self) -> Self:
         return self
@@ -34,32 +166,217 @@ class Thd:
         err_traceback,
     ):
         self._is_queue_locked = True
+        if err_val is None and self._ops:
+            try:
+                await self._commit()
+            except Exception:
+                await self._rollback()
+                raise
+            return
         if err_val:
-            while len(self._rollback_stack) != 0:
-                fn, preresult = self._rollback_stack.pop()
-                if inspect.iscoroutine(fn):
-                    panic(f"expected corofn, but coroutine {fn}")
-                try:
-                    if inspect.iscoroutinefunction(fn):
-                        await fn(preresult)
-                        return
-                    fn(preresult)
-                except Exception as err:
-                    log.warn(
-                        "catch err (below) during rollback, during execution"
-                        f" of fn {fn} => continue",
-                    )
-                    log.catch(err)
+            await self._rollback()
+
+    async def _commit(self):
+        sem = asyncio.Semaphore(self._max_concurrency)
+        group: list[_DeferredOp] = []
+        for op in self._ops:
+            if op.is_independent:
+                group.append(op)
+                continue
+            await self._exec_group(group, sem)
+            group = []
+            await self._exec_op(op)
+        await self._exec_group(group, sem)
+
+    async def _exec_group(
+        self,
+        group: list[_DeferredOp],
+        sem: asyncio.Semaphore,
+    ):
+        if not group:
+            return
+        kind_to_ops: dict[str, list[_DeferredOp]] = {}
+        coros = []
+        for op in group:
+            if op.kind is not None:
+                kind_to_ops.setdefault(op.kind, []).append(op)
+                continue
+            coros.append(self._exec_op(op))
+        for kind, ops in kind_to_ops.items():
+            coros.append(self._exec_bulk(kind, ops))
+
+        async def limited(coro: Coroutine) -> Any:
+            async with sem:
+                return await coro
+
+        results = await asyncio.gather(
+            *[limited(c) for c in coros], return_exceptions=True)
+        for r in results:
+            if isinstance(r, BaseException):
+                raise r
+
+    async def _exec_op(self, op: _DeferredOp):
+        assert op.fn is not None
+        val = op.fn()
+        if inspect.isawaitable(val):
+            val = await val
+        op.deferred.set(val)
+        self._journal.push(
+            op.rollback_fn,  # type: ignore
+            op.pick(val) if op.pick else val,
+            op.is_independent,
+        )
+
+    async def _exec_bulk(self, kind: str, ops: list[_DeferredOp]):
+        results = self._bulk_fns[kind]([op.item for op in ops])
+        if inspect.isawaitable(results):
+            results = await results
+        for i, op in enumerate(ops):
+            # without returned results, items act as results themselves
+            val = results[i] if isinstance(results, list) else op.item
+            op.deferred.set(val)
+            if op.rollback_fn is not None:
+                self._journal.push(op.rollback_fn, val, True)
+
+    async def _rollback(self, mark: int = 0):
+        """
+        Rolls back journal entries until there are ``mark`` of them left.
+        """
+        sem = asyncio.Semaphore(self._max_concurrency)
+        errs: list[tuple[Callable, Exception]] = []
+        while len(self._journal) > mark:
+            fn, preresult, is_independent = self._journal.pop()
+            if not is_independent:
+                await self._rollback_step(fn, preresult, errs)
+                continue
+
+            group = [(fn, preresult)]
+            while self._journal.is_last_independent(mark):
+                fn, preresult, _ = self._journal.pop()
+                group.append((fn, preresult))
+
+            async def limited(fn: Callable, preresult: Any):
+                async with sem:
+                    await self._rollback_step(fn, preresult, errs)
+
+            await asyncio.gather(*[limited(f, p) for f, p in group])
+
+        if errs:
+            self.rollback_err = Err(
+                f"{len(errs)} rollback steps failed: "
+                + "; ".join(f"{fn}: {err!r}" for fn, err in errs))
+            log.warn(f"{self.rollback_err} => continue")
+
+    async def _rollback_step(
+        self,
+        fn: Callable[[Any], Awaitable[None] | None],
+        preresult: Any,
+        errs: list[tuple[Callable, Exception]],
+    ):
+        try:
+            r = fn(preresult)
+            if inspect.isawaitable(r):
+                await r
+        except Exception as err:
+            errs.append((fn, err))
+            log.catch(err, 2)
+
+    @contextlib.asynccontextmanager
+    async def savepoint(self) -> AsyncIterator[Self]:
+        """
+        Creates a savepoint, to which the thd is rolled back on err inside
+        the block.
+
+        The err is reraised, so it can be handled by the caller without
+        rolling back the operations registered before the savepoint. In
+        defer mode, operations queued inside the block are dropped.
+        """
+        journal_mark = len(self._journal)
+        ops_mark = len(self._ops)
+        try:
+            yield self
+        except Exception:
+            del self._ops[ops_mark:]
+            await self._rollback(journal_mark)
+            raise
+
+    def _check_rollback_fn(self, fn: Callable):
+        if inspect.iscoroutine(fn):
+            panic(f"expected corofn, but coroutine {fn}")
+
+    def d(
+        self,
+        fn: Callable[[], T | Awaitable[T]],
+        rollback_fn: Callable[[T], Any],
+        *,
+        is_independent: bool = False,
+        pick: Callable[[T], Any] | None = None,
+    ) -> Deferred[T]:
+        """
+        Defers an operation until commit.
+
+        Fn can be either sync or async.
+
+        Independent operations can be executed concurrently with neighbour
+        independent operations.
+        """
+        self._check_defer()
+        self._check_rollback_fn(rollback_fn)
+        op = _DeferredOp(
+            fn, rollback_fn, is_independent=is_independent, pick=pick)
+        self._ops.append(op)
+        return op.deferred
+
+    def d_bulk(
+        self,
+        kind: str,
+        item: Any,
+        rollback_fn: Callable[[Any], Any] | None = None,
+    ) -> Deferred[Any]:
+        """
+        Defers an operation executed on commit by the kind's bulk fn.
+
+        Bulk operations are always independent.
+        """
+        self._check_defer()
+        if kind not in self._bulk_fns:
+            panic(f"bulk kind {kind} is not regd")
+        op = _DeferredOp(
+            None, rollback_fn, kind=kind, item=item, is_independent=True)
+        self._ops.append(op)
+        return op.deferred
+
+    def _check_defer(self):
+        if self._mode != "defer":
+            panic("deferred operations are available only in defer mode")
+        if self._is_queue_locked:
+            panic("thd queue is locked")
 
     def a(
         self,
         fn: Callable[[], T],
-        rollback_fn: Callable[[T], Any],
+        rollback_fn: Callable[[Any], Any],
+        *,
+        is_independent: bool = False,
+        pick: Callable[[T], Any] | None = None,
     ) -> T:
+        """
+        Executes an operation and registers its rollback.
+
+        Rollbacks of independent operations can be executed concurrently
+        with rollbacks of neighbour independent operations.
+
+        If ``pick`` is given, its result for the operation result is passed
+        to the rollback fn instead of the whole operation result, so the
+        latter is not kept alive by the thd.
+        """
         if self._is_queue_locked:
             panic("thd queue is locked")
+        if self._mode == "defer":
+            panic("use d() in defer mode")
+        self._check_rollback_fn(rollback_fn)
         f = fn()
-        self._rollback_stack.append((rollback_fn, f))
+        self._journal.push(rollback_fn, pick(f) if pick else f, is_independent)
         return f
 
     def a_delete(
@@ -90,11 +407,21 @@ class Thd:
     async def aa(
         self,
         fn: Coroutine[Any, Any, T],
-        rollback_corofn: Callable[[T], Awaitable[Any]],
+        rollback_corofn: Callable[[Any], Awaitable[Any]],
+        *,
+        is_independent: bool = False,
+        pick: Callable[[T], Any] | None = None,
     ) -> T:
+        """
+        Same as a(), but async.
+        """
         if self._is_queue_locked:
-            Err("thd queue")
+            panic("thd queue is locked")
+        if self._mode == "defer":
+            panic("use d() in defer mode")
+        self._check_rollback_fn(rollback_corofn)
         f = await fn
-        self._rollback_stack.append((rollback_corofn, f))
+        self._journal.push(
+            rollback_corofn, pick(f) if pick else f, is_independent)
         return f
 
@@ -5,17 +5,50 @@ import inspect
 import traceback
 import types
 
+FrameRecord = tuple[str, int, str]
+"""
+Filename, line number and function name of a traceback frame.
+"""
 
 def fmt_stack_summary(summary: traceback.StackSummary) -> str:
     return "".join(
         list(traceback.StackSummary.from_list(summary).format())).strip()
 
+def fmt_frames(frames: list[FrameRecord]) -> str:
+    """
+    Formats frame records like a regular traceback.
+
+    Source lines are looked up lazily, so they are shown only if the files
+    are available to the current process.
+    """
+    return fmt_stack_summary(traceback.StackSummary.from_list(
+        [(filename, lineno, name, None) for filename, lineno, name in frames],
+    ))
+
+def get_frames(err: Exception) -> list[FrameRecord]:
+    """
+    Summarizes err traceback into picklable frame records.
+
+    Records are ordered from the outermost frame to the innermost one, as in
+    ``traceback.extract_tb``, but no source lines are looked up.
+    """
+    frames: list[FrameRecord] = []
+    tb = err.__traceback__
+    while tb is not None:
+        code = tb.tb_frame.f_code
+        frames.append((code.co_filename, tb.tb_lineno, code.co_name))
+        tb = tb.tb_next
+    return frames
+
 def get_as_str(err: Exception) -> str | None:
     s = None
     tb = err.__traceback__
     if tb:
         summary = traceback.extract_tb(tb)
         s = fmt_stack_summary(summary)
+    elif getattr(err, "frames", None):
+        # errs received from other processes carry frame records instead
+        s = fmt_frames(err.frames)  # type: ignore
     return s
 
 def set(
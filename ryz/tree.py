@@ -1,5 +1,7 @@
-from typing import Callable, Generic, Self
+from array import array
+from typing import Callable, Generic, Iterator, Self, TextIO
 
+from ryz.core import Err, Ok, Res, ecode
 from ryz.types import T
 
 
@@ -19,22 +21,285 @@ class ReversedTreeNode(Generic[T]):
     def __str__(self) -> str:
         return f"<ReversedTreeNode val = {self.val}, parent = {self.parent}>"
 
+class ArrTree(Generic[T]):
+    """
+    Compact tree stored in arrays.
+
+    Nodes are indexed in BFS order, so the root is 0, and childs of a node
+    are stored contiguously: childs of node ``i`` are indexes from
+    ``offsets[i]`` to ``offsets[i + 1]``. Besides vals, each node takes
+    16 bytes for its parent index and child offset.
+
+    All traversals are iterative, so tree depth is not limited by the
+    recursion limit.
+    """
+    def __init__(self, root: TreeNode[T]):
+        self.vals: list[T] = []
+        self.parents = array("q", [-1])
+        self.offsets = array("q")
+
+        queue: list[TreeNode[T]] = [root]
+        for i, node in enumerate(queue):
+            self.vals.append(node.val)
+            self.offsets.append(len(queue))
+            for child in node.childs:
+                self.parents.append(i)
+                queue.append(child)
+        self.offsets.append(len(queue))
+
+    def __len__(self) -> int:
+        return len(self.vals)
+
+    def get_childs(self, i: int) -> range:
+        return range(self.offsets[i], self.offsets[i + 1])
+
+    def is_leaf(self, i: int) -> bool:
+        return self.offsets[i] == self.offsets[i + 1]
+
+    def iter_pre(self) -> Iterator[int]:
+        """
+        Iterates node indexes in pre-order.
+        """
+        stack = [0]
+        while stack:
+            i = stack.pop()
+            yield i
+            stack.extend(reversed(self.get_childs(i)))
+
+    def iter_post(self) -> Iterator[int]:
+        """
+        Iterates node indexes in post-order.
+        """
+        # pre-order with childs visited from right to left is the reversed
+        # post-order
+        reversed_post = array("q")
+        stack = [0]
+        while stack:
+            i = stack.pop()
+            reversed_post.append(i)
+            stack.extend(self.get_childs(i))
+        return reversed(reversed_post)
+
+    def iter_bfs(self) -> Iterator[int]:
+        """
+        Iterates node indexes in BFS order.
+        """
+        return iter(range(len(self)))
+
+    def iter_paths(self) -> Iterator[list[T]]:
+        """
+        Iterates vals on paths from the root to each leaf, leaves are taken
+        in pre-order.
+        """
+        for leaf in self.iter_pre():
+            if not self.is_leaf(leaf):
+                continue
+            path: list[T] = []
+            i = leaf
+            while i != -1:
+                path.append(self.vals[i])
+                i = self.parents[i]
+            path.reverse()
+            yield path
+
+    def write(self, f: TextIO, fmt: Callable[[T], str] = str):
+        """
+        Writes the tree to a file-like object line by line.
+
+        Each node is written as its formatted val, indented by its depth.
+        """
+        f.write(f"x {fmt(self.vals[0])}\n")
+        stack = [(i, 1) for i in reversed(self.get_childs(0))]
+        while stack:
+            i, depth = stack.pop()
+            f.write("\t" * depth + f" - {fmt(self.vals[i])}\n")
+            stack.extend(
+                (child, depth + 1) for child in reversed(self.get_childs(i)))
+
+class TreeIndex(Generic[T]):
+    """
+    Index of a tree for ancestor, LCA and subtree queries.
+
+    Nodes are numbered in pre-order, so the subtree of a node is a
+    contiguous range of numbers from the node's number to its exit number,
+    and ancestor checks are two comparisons. LCA uses binary lifting
+    tables, where ``up[k][i]`` is the ``2**k``-th ancestor of node ``i``.
+
+    Leaves appended by ``append_leaf`` are numbered after indexed nodes and
+    kept pending until their count exceeds the rebuild threshold: queries
+    on them fall back to binary lifting and a scan of pending nodes.
+
+    Args:
+        root:
+            Root of the tree to index.
+        rebuild_threshold:
+            Number of pending leaves after which the index is rebuilt.
+    """
+    def __init__(self, root: TreeNode[T], *, rebuild_threshold: int = 256):
+        self.root = root
+        self._rebuild_threshold = rebuild_threshold
+        self.rebuild()
+
+    def rebuild(self):
+        """
+        Rebuilds the index from the root, including all pending leaves.
+        """
+        self._nodes: list[TreeNode[T]] = []
+        self._idxs: dict[TreeNode[T], int] = {}
+        parents = array("q")
+        self._depths = array("q")
+
+        stack: list[tuple[TreeNode[T], int, int]] = [(self.root, -1, 0)]
+        while stack:
+            node, parent, depth = stack.pop()
+            i = len(self._nodes)
+            self._nodes.append(node)
+            self._idxs[node] = i
+            parents.append(parent)
+            self._depths.append(depth)
+            stack.extend(
+                (child, i, depth + 1) for child in reversed(node.childs))
+
+        size = len(self._nodes)
+        self._indexed_size = size
+        # childs follow their parent in pre-order, so sizes are complete
+        # when walking backwards
+        subtree_sizes = array("q", [1]) * size
+        for i in range(size - 1, 0, -1):
+            subtree_sizes[parents[i]] += subtree_sizes[i]
+        self._touts = array(
+            "q", (i + subtree_sizes[i] - 1 for i in range(size)))
+        # the closest indexed ancestor-or-self of each node
+        self._anchors = array("q", range(size))
+
+        self._up = [parents]
+        self._ensure_levels(max(self._depths))
+
+    def __len__(self) -> int:
+        return len(self._nodes)
+
+    def has(self, node: TreeNode[T]) -> bool:
+        return node in self._idxs
+
+    def count_pending(self) -> int:
+        return len(self._nodes) - self._indexed_size
+
+    def is_ancestor(self, a: TreeNode[T], b: TreeNode[T]) -> bool:
+        """
+        Checks whether node a is an ancestor of node b, or b itself.
+
+        Takes O(1) if a is not a pending leaf.
+        """
+        ia = self._idxs[a]
+        ib = self._idxs[b]
+        if ia < self._indexed_size:
+            return ia <= self._anchors[ib] <= self._touts[ia]
+        diff = self._depths[ib] - self._depths[ia]
+        return diff >= 0 and self._lift(ib, diff) == ia
+
+    def get_lca(self, a: TreeNode[T], b: TreeNode[T]) -> TreeNode[T]:
+        """
+        Gets the lowest common ancestor of two nodes in O(log n).
+        """
+        ia = self._idxs[a]
+        ib = self._idxs[b]
+        if self._depths[ia] < self._depths[ib]:
+            ia, ib = ib, ia
+        ia = self._lift(ia, self._depths[ia] - self._depths[ib])
+        if ia == ib:
+            return self._nodes[ia]
+        for level in reversed(self._up):
+            if level[ia] != level[ib]:
+                ia = level[ia]
+                ib = level[ib]
+        return self._nodes[self._up[0][ia]]
+
+    def get_subtree(self, node: TreeNode[T]) -> list[TreeNode[T]]:
+        """
+        Gets nodes of the subtree under the node, including the node itself.
+
+        Indexed nodes are returned in pre-order, followed by pending leaves
+        in order of appending.
+        """
+        i = self._idxs[node]
+        f = []
+        if i < self._indexed_size:
+            f = self._nodes[i:self._touts[i] + 1]
+        f.extend(
+            pending for pending in self._nodes[self._indexed_size:]
+            if self.is_ancestor(node, pending))
+        return f
+
+    def get_depth(self, node: TreeNode[T]) -> int:
+        return self._depths[self._idxs[node]]
+
+    def append_leaf(
+        self,
+        parent: TreeNode[T],
+        leaf: TreeNode[T],
+    ) -> Res[None]:
+        """
+        Appends a leaf to the parent's childs and indexes it.
+        """
+        if parent not in self._idxs:
+            return Err(f"parent {parent}", ecode.NotFound)
+        if leaf in self._idxs:
+            return Err(f"leaf {leaf} is already indexed")
+        if leaf.childs:
+            return Err(f"leaf {leaf} has childs")
+        parent.childs.append(leaf)
+
+        ip = self._idxs[parent]
+        i = len(self._nodes)
+        self._nodes.append(leaf)
+        self._idxs[leaf] = i
+        self._depths.append(self._depths[ip] + 1)
+        self._anchors.append(self._anchors[ip])
+        self._up[0].append(ip)
+        for k in range(1, len(self._up)):
+            prev = self._up[k - 1][i]
+            self._up[k].append(-1 if prev == -1 else self._up[k - 1][prev])
+        self._ensure_levels(self._depths[i])
+
+        if self.count_pending() > self._rebuild_threshold:
+            self.rebuild()
+        return Ok(None)
+
+    def _ensure_levels(self, depth: int):
+        while (1 << len(self._up)) <= depth:
+            prev = self._up[-1]
+            self._up.append(array(
+                "q", (-1 if p == -1 else prev[p] for p in prev)))
+
+    def _lift(self, i: int, diff: int) -> int:
+        k = 0
+        while diff and i != -1:
+            if diff & 1:
+                i = self._up[k][i]
+            diff >>= 1
+            k += 1
+        return i
+
 class TreeUtils:
     @classmethod
     async def reverse(
         cls,
         root_node: TreeNode[T],
-        *,
-        _parent_rnode: ReversedTreeNode[T] | None = None,
     ) -> list[ReversedTreeNode[T]]:
-        root_rnode = ReversedTreeNode(root_node.val, _parent_rnode)
-        if not root_node.childs:
-            return [root_rnode]
-
-        f = []
-        for child in root_node.childs:
-            f.extend(await cls.reverse(child, _parent_rnode=root_rnode))
-
+        """
+        Returns leaves of the tree, each linked to its parent up to the root.
+        """
+        f: list[ReversedTreeNode[T]] = []
+        stack: list[tuple[TreeNode[T], ReversedTreeNode[T] | None]] = [
+            (root_node, None),
+        ]
+        while stack:
+            node, parent_rnode = stack.pop()
+            rnode = ReversedTreeNode(node.val, parent_rnode)
+            if not node.childs:
+                f.append(rnode)
+                continue
+            stack.extend((child, rnode) for child in reversed(node.childs))
         return f
 
     @classmethod
@@ -43,19 +308,10 @@ class TreeUtils:
         root_node: TreeNode,
         print_action: Callable[[str], None] = print,
     ):
-        def uncover(node: TreeNode, depth: int) -> str:
-            msg = ""
-            tabs = "\t" * depth
-
-            for c in node.childs:
-                msg += f"{tabs} - {c}\n"
-                msg += uncover(c, depth + 1)
-
-            return msg
-
-        msg = f"x {root_node}\n"
-        depth = 1
-
-        msg += uncover(root_node, depth)
-        print_action(msg.strip())
-
+        parts = [f"x {root_node}\n"]
+        stack = [(c, 1) for c in reversed(root_node.childs)]
+        while stack:
+            node, depth = stack.pop()
+            parts.append("\t" * depth + f" - {node}\n")
+            stack.extend((c, depth + 1) for c in reversed(node.childs))
+        print_action("".join(parts).strip())
@@ -1,6 +1,7 @@
 import pytest
 
-from ryz.cls import ClassUtils
+from ryz.cls import ClassUtils, SubclassIndex, SubclassIndexed
+from ryz.core import ecode
 
 
 def test_bind_first_arg():
@@ -22,3 +23,66 @@ async def test_bind_first_arg_async():
     assert await ClassUtils.bind_first_arg_async(a)(A.hello)(
         "wow", 4,
     ) == "wowwowwowwow"
+
+
+def test_subclass_index():
+    class Base(SubclassIndexed):
+        pass
+
+    class A(Base):
+        pass
+
+    class B(A):
+        pass
+
+    index = ClassUtils.get_subclass_index(Base)
+    assert index.get_all() == [A, B]
+    assert index.get_descendants(A) == [B]
+    assert index.get_by_name("B").unwrap() is B
+    assert index.get_by_name("Base").unwrap() is Base
+    assert index.get_by_name("C").is_(ecode.NotFound)
+
+    class C(Base):
+        pass
+
+    # the index is rebuilt for the new subclass
+    assert index.get_by_name("C").unwrap() is C
+    assert ClassUtils.find_all_subclasses(Base) == [A, B, C]
+    assert ClassUtils.find_subclass_by_name("C", Base) is C
+
+
+def test_subclass_index_diamond():
+    class Base(SubclassIndexed):
+        pass
+
+    class A(Base):
+        pass
+
+    class B(Base):
+        pass
+
+    class D(A, B):
+        pass
+
+    index = ClassUtils.get_subclass_index(Base)
+    assert index.get_all() == [A, D, B]
+    assert index.get_descendants(A) == [D]
+    assert index.get_descendants(B) == [D]
+    assert index.get_descendants(D) == []
+
+
+def test_subclass_index_ambiguous():
+    class Base(SubclassIndexed):
+        pass
+
+    class A(Base):
+        pass
+
+    class B(Base):
+        class A(Base):
+            pass
+
+    index = SubclassIndex(Base)
+    assert index.get_by_name("A").is_(ecode.Val)
+    assert index.get_ambiguous_names() == ["A"]
+    assert ClassUtils.find_subclass_by_name("A", Base) is A
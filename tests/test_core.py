@@ -0,0 +1,52 @@
+import pickle
+from pathlib import Path
+
+from ryz import log, traceback
+from ryz.core import Code, Err, ecode, pack_errs, unpack_errs
+
+
+def _create_err() -> Err:
+    return Err("hello", ecode.NotFound)
+
+def test_pickle():
+    err = _create_err()
+    unpickled = pickle.loads(pickle.dumps(err))  # noqa: S301
+
+    assert isinstance(unpickled, Err)
+    assert unpickled.code == ecode.NotFound
+    assert unpickled.msg == "hello"
+    assert unpickled.args == err.args
+    assert unpickled.frames == traceback.get_frames(err)
+    tb_str = traceback.get_as_str(unpickled)
+    assert tb_str
+    assert "_create_err" in tb_str
+
+def test_pack_errs():
+    errs = [_create_err(), Err("world")]
+    packed = pickle.dumps(pack_errs(errs))
+    unpacked = unpack_errs(pickle.loads(packed))  # noqa: S301
+
+    assert [e.code for e in unpacked] == [ecode.NotFound, ecode.Err]
+    assert [e.msg for e in unpacked] == ["hello", "world"]
+    for err, unpacked_err in zip(errs, unpacked, strict=True):
+        assert unpacked_err.frames == traceback.get_frames(err)
+
+def test_track_unpickled():
+    err = pickle.loads(pickle.dumps(_create_err()))  # noqa: S301
+    tracksid = err.track()
+    assert tracksid
+    content = Path(log.err_track_dir, f"{tracksid}.log").read_text()
+    assert "_create_err" in content
+
+class _Coded:
+    @staticmethod
+    def code() -> str:
+        return "coded"
+
+async def test_code_upd():
+    Code.destroy()
+    (await Code.upd([_Coded])).unwrap()
+    assert (await Code.get_regd_codes()).unwrap() == ["coded"]
+    assert (await Code.get_regd_codeid_by_type(_Coded)).unwrap() == 0
+    assert (await Code.get_regd_type_by_code("coded")).unwrap() is _Coded
+    Code.destroy()
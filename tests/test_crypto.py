@@ -0,0 +1,64 @@
+import asyncio
+
+from ryz.crypto import CryptoUtils
+
+
+async def test_async():
+    CryptoUtils.setup_executor(2)
+    hashed = await CryptoUtils.ahash_password(b"hello")
+    assert await CryptoUtils.acheck_password(b"hello", hashed)
+
+    check_task = asyncio.create_task(CryptoUtils.acheck_passwords(
+        [(b"hello", hashed), (b"wrong", hashed), (b"hello", hashed)],
+    ))
+    await asyncio.sleep(0)
+    # the event loop is not blocked while checking
+    assert CryptoUtils.metrics().queued == 1
+    assert await check_task == [True, False, True]
+
+    metrics = CryptoUtils.metrics()
+    assert metrics.completed == metrics.submitted
+    assert metrics.queued == 0
+    assert metrics.peak_queued >= 1
+    assert metrics.latency_max > 0
+
+
+def test_processes():
+    CryptoUtils.setup_executor(2, use_processes=True)
+    hashed = CryptoUtils.hash_password(b"hello")
+    assert CryptoUtils.check_passwords(
+        [(b"wrong", hashed), (b"hello", hashed)],
+    ) == [False, True]
+    CryptoUtils.setup_executor()
+
+
+async def test_rehash():
+    hashed = CryptoUtils.hash_password(b"hello", 4)
+    assert CryptoUtils.get_cost(hashed).unwrap() == 4
+    assert CryptoUtils.get_cost(b"nonsense").is_err()
+    assert CryptoUtils.needs_rehash(hashed)
+
+    CryptoUtils.cost = 5
+    try:
+        assert CryptoUtils.check_and_rehash_password(b"wrong", hashed) == (
+            False, None,
+        )
+        is_ok, new_hashed = await CryptoUtils.acheck_and_rehash_password(
+            b"hello", hashed,
+        )
+        assert is_ok
+        assert new_hashed is not None
+        assert CryptoUtils.get_cost(new_hashed).unwrap() == 5
+        assert CryptoUtils.check_and_rehash_password(
+            b"hello", new_hashed,
+        ) == (True, None)
+    finally:
+        CryptoUtils.cost = 12
+
+
+def test_calibrate_cost():
+    cost = CryptoUtils.calibrate_cost(
+        0.02, max_cost=10, is_applied=False,
+    )
+    assert 4 <= cost <= 10
+    assert CryptoUtils.cost == 12
@@ -0,0 +1,175 @@
+import json
+from pathlib import Path
+
+import dictdiffer
+import yaml
+
+from ryz.core import Err, ecode
+from ryz.dict import (
+    KeyIndex,
+    diff,
+    get_path,
+    get_recursive,
+    get_recursive_from_file,
+    get_recursive_many,
+    get_recursive_many_from_file,
+    patch,
+)
+
+
+def _make_dict() -> dict:
+    return {
+        "a": {"x": 1, "b": {"y": 2}},
+        "x": 3,
+        "c": {"y": 4, "z": {"x": 5}},
+    }
+
+def test_key_index():
+    d = _make_dict()
+    index = KeyIndex(d)
+    for key in ["a", "b", "c", "x", "y", "z"]:
+        assert index.get(key).unwrap() == get_recursive(d, key).unwrap()
+    assert index.get_paths("x") == [("a", "x"), ("x",), ("c", "z", "x")]
+    assert index.get_all("y") == [2, 4]
+
+    r = index.get("w")
+    assert isinstance(r, Err)
+    assert r.is_(ecode.NotFound)
+    assert index.get("w", 0).unwrap() == 0
+
+    results = index.get_many(["x", "y", "w"])
+    assert results["x"].unwrap() == 1
+    assert results["y"].unwrap() == 2
+    assert results["w"].is_err()
+
+def test_key_index_stale():
+    d = _make_dict()
+    index = KeyIndex(d)
+    assert not index.is_stale()
+
+    d["x"] = 6
+    assert not index.is_stale()
+    assert index.get_all("x") == [1, 6, 5]
+
+    d["c"]["z"] = {"x": 7}
+    assert index.is_stale()
+    index.rebuild()
+    assert not index.is_stale()
+    assert index.get_all("x") == [1, 6, 7]
+
+    d["x"] = {}
+    assert index.is_stale()
+    index.rebuild()
+    del d["a"]["b"]
+    d["a"]["w"] = 8
+    assert index.is_stale()
+
+def test_get_recursive_many():
+    d = _make_dict()
+    results = get_recursive_many(d, ["x", "z", "w"])
+    assert results["x"].unwrap() == 1
+    assert results["z"].unwrap() == {"x": 5}
+    assert results["w"].is_(ecode.NotFound)
+    assert get_recursive_many(d, ["w"], 0)["w"].unwrap() == 0
+
+def test_get_path():
+    d = _make_dict()
+    assert get_path(d, "c.z.x").unwrap() == 5
+    assert get_path(d, ["a", "b"]).unwrap() == {"y": 2}
+    assert get_path(d, "a.x.y").is_(ecode.NotFound)
+    assert KeyIndex(d).get_path("a.b.y").unwrap() == 2
+
+def test_get_recursive_from_json(tmp_path: Path):
+    deep: list = [{"x": 0}]
+    for _ in range(20):
+        deep = [deep, "]"]
+    d = {
+        "deep": deep,
+        "l": [{"x": 0}, "]}\\\"", 1.5],
+        **_make_dict(),
+        "k\"ey": {"é": None},
+    }
+    path = Path(tmp_path, "doc.json")
+    path.write_text(json.dumps(d, indent=2))
+
+    for use_mmap in [False, True]:
+        for chunk_size in [1, 5, 1 << 20]:
+            results = get_recursive_many_from_file(
+                path,
+                ["x", "b", "é", "k\"ey", "w"],
+                use_mmap=use_mmap,
+                chunk_size=chunk_size,
+            )
+            assert results["x"].unwrap() == 1
+            assert results["b"].unwrap() == {"y": 2}
+            assert results["é"].unwrap() is None
+            assert results["k\"ey"].unwrap() == {"é": None}
+            assert results["w"].is_(ecode.NotFound)
+    assert get_recursive_from_file(path, "z").unwrap() == {"x": 5}
+    assert get_recursive_from_file(path, "w", 0).unwrap() == 0
+
+    path.write_text('{"x": 1, "x": 2}')
+    # unlike with loading, the first of duplicate keys is taken
+    assert get_recursive_from_file(path, "x").unwrap() == 1
+
+def test_get_recursive_from_yaml(tmp_path: Path):
+    path = Path(tmp_path, "doc.yaml")
+    path.write_text(
+        "skip: [1, {x: 0}]\n"
+        "base: &base\n"
+        "  y: 1\n"
+        "nested:\n"
+        "  list: [&item {z: 2}]\n"
+        "  x: *item\n"
+        "copy: *base\n",
+    )
+    d = yaml.safe_load(path.read_text())
+    for use_mmap in [False, True]:
+        results = get_recursive_many_from_file(
+            path, ["x", "y", "z", "copy"], use_mmap=use_mmap)
+        for k, r in results.items():
+            assert r.unwrap() == get_recursive(d, k).unwrap()
+
+def test_get_recursive_from_file_err(tmp_path: Path):
+    path = Path(tmp_path, "doc.json")
+    path.write_text("[1, 2]")
+    assert get_recursive_from_file(path, "x").is_(ecode.Val)
+    path.write_text('{"x": 1')
+    assert get_recursive_from_file(path, "y").is_(ecode.Val)
+    # the scan stops before the malformed part
+    assert get_recursive_from_file(path, "x").unwrap() == 1
+    assert get_recursive_from_file(
+        Path(tmp_path, "doc.txt"), "x").is_(ecode.Unsupported)
+    assert get_recursive_from_file(
+        Path(tmp_path, "missing.json"), "x").is_(ecode.Val)
+
+def test_diff_patch():
+    first = {
+        "a": {"x": 1, "b": {"y": 2}},
+        "l": [1, 2, 3],
+        "s": {1, 2},
+        "k.dot": {"x": 1},
+    }
+    second = {
+        "a": {"x": 2, "b": {"y": 2}, "c": 3},
+        "l": [1, 4],
+        "s": {2, 3},
+        "k.dot": {},
+    }
+    changes = list(diff(first, second))
+    assert changes == list(dictdiffer.diff(first, second))
+    assert ("change", "a.x", (1, 2)) in changes
+    assert ("remove", ["k.dot"], [("x", 1)]) in changes
+
+    patched = patch(iter(changes), first).unwrap()
+    assert patched == second
+    assert first["a"]["x"] == 1
+    # unchanged containers are shared
+    assert patched["a"]["b"] is first["a"]["b"]
+    assert not list(diff(patched["a"]["b"], first["a"]["b"]))
+    assert dictdiffer.patch(changes, first) == second
+
+def test_patch_err():
+    r = patch([("change", "a.x", (1, 2))], {"a": 1})
+    assert isinstance(r, Err)
+    assert r.is_(ecode.Val)
@@ -37,3 +37,22 @@ def test_pascalify():
     assert \
         FormatUtils.pascalify("____56hello1_w23orld____") \
             == "____56hello1W23orld____"
+
+
+def test_many():
+    assert FormatUtils.snakefy_many(["HelloWorld", "HE"]) == [
+        "hello_world", "he",
+    ]
+    assert FormatUtils.pascalify_many(["hello_world", "h_e"]) == [
+        "HelloWorld", "HE",
+    ]
+
+
+def test_convert_keys():
+    d = {"HelloWorld": {"InnerKey": 1}, "Items": [{"ItemId": 2}, 3]}
+    assert FormatUtils.convert_keys(d, FormatUtils.snakefy) == {
+        "hello_world": {"InnerKey": 1}, "items": [{"ItemId": 2}, 3],
+    }
+    assert FormatUtils.convert_keys(
+        d, FormatUtils.snakefy, is_recursive=True,
+    ) == {"hello_world": {"inner_key": 1}, "items": [{"item_id": 2}, 3]}
@@ -0,0 +1,54 @@
+import pytest
+
+from ryz.core import Err, Ok, ecode
+from ryz.fn import FnSpec, call_many
+
+
+def _div(x: int, y: int = 1) -> float:
+    return x / y
+
+def _fail(x: int) -> Ok[int] | Err:
+    if x < 0:
+        return Err("negative", ecode.Val)
+    return Ok(x)
+
+def test_call():
+    spec = FnSpec(_div, (6,), {"y": 2})
+    assert spec.call() == 3
+    assert spec.call(appended_extra_kwargs={"y": 3}) == 2
+    assert spec.call(prepended_extra_kwargs={"y": 3}) == 3
+
+    spec.kwargs = None
+    assert spec.call(appended_extra_args=(3,)) == 2
+    assert spec.call(prepended_extra_args=(12,)) == 2
+
+def test_call_many():
+    specs = [
+        FnSpec(_div, (6, 3)),
+        FnSpec(_div, (1, 0)),
+        FnSpec(_fail, (-1,)),
+        FnSpec(_fail, (1,)),
+    ]
+    for mode in ["inline", "thread", "process"]:
+        results = call_many(specs, mode, max_workers=2)  # type: ignore
+        assert results[0].unwrap() == 2
+        assert results[1].is_err()
+        assert results[2].is_(ecode.Val)
+        assert results[3].unwrap() == 1
+
+def test_call_many_unpicklable():
+    specs = [
+        FnSpec(_div, (6, 3)),
+        FnSpec(lambda: 1),
+        FnSpec(_div, (4, 2)),
+    ]
+    results = call_many(specs, "process", max_workers=2)
+    # only the spec which cannot be sent fails
+    assert results[0].unwrap() == 2
+    assert results[1].is_err()
+    assert results[2].unwrap() == 2
+
+def test_call_many_unknown_mode():
+    with pytest.raises(Err) as exc_info:
+        call_many([FnSpec(_div, (1,))], "threads")  # type: ignore
+    assert exc_info.value.is_(ecode.Panic)
@@ -1,5 +1,6 @@
 from ryz.core import Err
-from ryz.keeper import IntKeeper
+from ryz.keeper import IntKeeper, SharedIntKeeper
+from ryz.proc import ProcGroup
 from ryz.range import Range
 
 
@@ -20,3 +21,42 @@ def test_int_keeper():
 
     r = k.recv()
     assert isinstance(r, Err)
+
+def test_int_keeper_many():
+    k = IntKeeper(Range(10, 15))
+
+    assert k.recv_many(4).unwrap() == [10, 11, 12, 13]
+    assert isinstance(k.recv_many(3), Err)
+    assert k.count_available() == 2
+
+    assert isinstance(k.free_many([11, 14]), Err)
+    assert k.has(11)
+    k.free_many([11, 12]).unwrap()
+    assert not k.has(11)
+
+    assert k.recv_many(4).unwrap() == [12, 11, 14, 15]
+    assert k.count_available() == 0
+
+def _recv_shared_target(pipe, keeper: SharedIntKeeper):
+    pipe.send([keeper.recv().unwrap() for _ in range(15)])
+
+def test_shared_int_keeper():
+    keeper = SharedIntKeeper(Range(0, 99), block_size=10)
+    group = ProcGroup()
+    pids = [
+        group.reg(
+            _recv_shared_target, str(i), proc_kwargs={"keeper": keeper},
+        ).unwrap()
+        for i in range(3)
+    ]
+    vals = [keeper.recv().unwrap() for _ in range(15)]
+    for r in group.gather(5).values():
+        vals.extend(r.unwrap())
+    assert len(set(vals)) == 60
+
+    # 2 blocks of 10 for 15 vals
+    assert [keeper.release(pid) for pid in pids] == [2, 2, 2]
+    keeper.free(vals[0]).unwrap()
+    assert isinstance(keeper.free(vals[-1]), Err)
+    keeper.close()
+    keeper.unlink()
@@ -1,4 +1,9 @@
-from ryz.lock import Lock
+import asyncio
+from pathlib import Path
+
+import pytest
+
+from ryz.lock import FileLock, Lock, RWLock, get_most_contended
 
 
 async def test_with():
@@ -6,3 +11,171 @@ async def test_with():
     async with lock:
         assert lock.is_locked()
     assert not lock.is_locked()
+
+
+async def test_mutual_exclusion():
+    lock = Lock()
+    holders = 0
+    max_holders = 0
+
+    async def hold():
+        nonlocal holders, max_holders
+        async with lock:
+            holders += 1
+            max_holders = max(max_holders, holders)
+            await asyncio.sleep(0)
+            holders -= 1
+
+    await asyncio.gather(*[hold() for _ in range(20)])
+    assert max_holders == 1
+    assert not lock.is_locked()
+
+async def test_fifo():
+    lock = Lock()
+    order = []
+
+    async def hold(i: int):
+        async with lock:
+            order.append(i)
+
+    token = await lock.acquire()
+    tasks = [asyncio.create_task(hold(i)) for i in range(5)]
+    await asyncio.sleep(0)
+    await lock.release(token)
+    await asyncio.gather(*tasks)
+    assert order == [0, 1, 2, 3, 4]
+
+async def test_cancelled_waiter():
+    lock = Lock()
+    token = await lock.acquire()
+    task = asyncio.create_task(lock.acquire())
+    await asyncio.sleep(0)
+    task.cancel()
+    await lock.release(token)
+    assert not lock.is_locked()
+
+async def test_rw_concurrent_readers():
+    lock = RWLock()
+    t1 = await lock.acquire_read()
+    t2 = await lock.acquire_read()
+    assert lock.is_locked()
+    assert not lock.is_write_locked()
+    await lock.release_read(t1)
+    await lock.release_read(t2)
+    assert not lock.is_locked()
+
+async def test_rw_writer_preference():
+    lock = RWLock()
+    order = []
+
+    async def read(i: int):
+        async with lock.read():
+            order.append(f"r{i}")
+
+    async def write():
+        async with lock.write():
+            order.append("w")
+
+    token = await lock.acquire_read()
+    tasks = [
+        asyncio.create_task(write()),
+        asyncio.create_task(read(1)),
+        asyncio.create_task(read(2)),
+    ]
+    await asyncio.sleep(0)
+    # readers arrived after the writer wait for it
+    assert not order
+    await lock.release_read(token)
+    await asyncio.gather(*tasks)
+    assert order == ["w", "r1", "r2"]
+
+async def test_rw_upgrade():
+    lock = RWLock()
+    order = []
+
+    async def write():
+        async with lock.write():
+            order.append("w")
+
+    token = await lock.acquire_read()
+    other_token = await lock.acquire_read()
+    task = asyncio.create_task(write())
+    upgrade_task = asyncio.create_task(lock.upgrade(token))
+    await asyncio.sleep(0)
+    assert not upgrade_task.done()
+
+    await lock.release_read(other_token)
+    write_token = await upgrade_task
+    assert lock.is_write_locked()
+    order.append("u")
+    await lock.release_write(write_token)
+    await task
+    assert order == ["u", "w"]
+
+async def test_rw_upgrade_cancelled():
+    lock = RWLock()
+    token = await lock.acquire_read()
+    other_token = await lock.acquire_read()
+    upgrade_task = asyncio.create_task(lock.upgrade(token))
+    await asyncio.sleep(0)
+    upgrade_task.cancel()
+    # the release comes before the upgrade task handles the cancellation
+    await lock.release_read(other_token)
+    assert not lock.is_locked()
+    with pytest.raises(asyncio.CancelledError):
+        await upgrade_task
+    assert not lock.is_locked()
+
+    write_token = await asyncio.wait_for(lock.acquire_write(), 1)
+    await lock.release_write(write_token)
+
+async def test_instrument():
+    lock = Lock("contended", instrument=True)
+    quiet_lock = Lock("quiet", instrument=True)
+
+    async def hold():
+        async with lock:
+            assert lock.stats
+            assert lock.stats.holder_site
+            assert "hold" in lock.stats.holder_site
+            await asyncio.sleep(0.001)
+
+    await asyncio.gather(*[hold() for _ in range(5)])
+    async with quiet_lock:
+        pass
+
+    stats = lock.stats
+    assert stats
+    assert stats.acquired == 5
+    assert stats.wait.get_count() == 5
+    assert stats.hold.get_count() == 5
+    assert stats.peak_waiters == 4
+    assert stats.holder_site is None
+    assert stats.wait.get_percentile(0.5) > 0
+    assert get_most_contended(2) == [lock, quiet_lock]
+
+async def test_file_lock(tmp_path: Path):
+    path = Path(tmp_path, "lock")
+    lock = FileLock(path)
+    other_lock = FileLock(path)
+
+    async with lock:
+        assert lock.is_locked()
+        with pytest.raises(TimeoutError):
+            await other_lock.acquire(0.01)
+    assert lock.last_hold_time is not None
+
+    token = await other_lock.acquire(1)
+    await other_lock.release(token)
+
+async def test_file_lock_shared(tmp_path: Path):
+    path = Path(tmp_path, "lock")
+    lock = FileLock(path, shared=True)
+    other_lock = FileLock(path, shared=True)
+
+    token = await lock.acquire()
+    other_token = await other_lock.acquire(0.01)
+    with pytest.raises(TimeoutError):
+        await FileLock(path).acquire(0.01)
+    await lock.release(token)
+    await other_lock.release(other_token)
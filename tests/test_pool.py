@@ -0,0 +1,83 @@
+import asyncio
+
+import pytest
+
+from ryz.core import Err, ecode
+from ryz.keeper import IntKeeper
+from ryz.pool import Pool
+from ryz.range import Range
+
+
+async def test_acquire_fifo():
+    pool = Pool(IntKeeper(Range(0, 0)), capacity=1)
+    val = (await pool.acquire()).unwrap()
+    order = []
+
+    async def acquire(i: int):
+        async with pool.lease() as v:
+            order.append((i, v))
+
+    tasks = [asyncio.create_task(acquire(i)) for i in range(3)]
+    await asyncio.sleep(0)
+    assert pool.metrics().waiting == 3
+    pool.release(val).unwrap()
+    await asyncio.gather(*tasks)
+
+    assert order == [(0, 0), (1, 0), (2, 0)]
+    metrics = pool.metrics()
+    assert metrics.acquired == 4
+    assert metrics.in_use == 0
+    assert metrics.peak_in_use == 1
+
+async def test_acquire_timeout():
+    pool = Pool(IntKeeper(Range(0, 0)))
+    (await pool.acquire()).unwrap()
+
+    r = await pool.acquire(0.01)
+    assert isinstance(r, Err)
+    assert r.is_(ecode.Timeout)
+    assert pool.metrics().timeouts == 1
+
+async def test_ttl():
+    pool = Pool(IntKeeper(Range(0, 0)), tick=0.01)
+    (await pool.acquire(ttl=0.02)).unwrap()
+
+    assert (await pool.acquire(1)).unwrap() == 0
+    assert pool.metrics().reclaimed == 1
+
+async def test_factory():
+    created = []
+    is_healthy = True
+
+    async def factory(val: int) -> str:
+        created.append(val)
+        return f"conn{val}"
+
+    async def check(conn: str) -> bool:
+        return is_healthy
+
+    pool = Pool(IntKeeper(Range(0, 0)), factory=factory, check=check)
+    async with pool.lease() as val:
+        assert pool.get_resource(val).unwrap() == "conn0"
+    async with pool.lease() as val:
+        pass
+    assert created == [0]
+    is_healthy = False
+    async with pool.lease() as val:
+        pass
+    assert created == [0, 0]
+
+async def test_factory_cancelled():
+    delays = [1, 0]
+
+    async def factory(val: int) -> str:
+        await asyncio.sleep(delays.pop(0))
+        return f"conn{val}"
+
+    pool = Pool(IntKeeper(Range(0, 0)), factory=factory)
+    with pytest.raises(TimeoutError):
+        await asyncio.wait_for(pool.acquire(), 0.01)
+    # the value is released back to the pool
+    assert pool.metrics().in_use == 0
+    val = (await pool.acquire(0.01)).unwrap()
+    assert pool.get_resource(val).unwrap() == "conn0"
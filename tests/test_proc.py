@@ -0,0 +1,110 @@
+import gc
+import threading
+import time
+from pathlib import Path
+
+from ryz import log
+from ryz.core import Err, ecode
+from ryz.proc import ProcGroup
+
+
+def _track_target(pipe):
+    log.info("hello from child")
+    pipe.send(Err("hello").track())
+
+def test_fwd_logs():
+    group = ProcGroup(fwd_logs=True)
+    pid = group.reg(_track_target, "child").unwrap()
+    tracksid = group.recv(pid).unwrap()
+    assert tracksid
+
+    # the child's record can still be in flight
+    path = Path(log.err_track_dir, f"{tracksid}.log")
+    deadline = time.time() + 5
+    while not path.exists() and time.time() < deadline:
+        time.sleep(0.01)
+    group.stop_fwd_logs(5)
+    assert path.exists()
+    assert path.read_text().split()[-1] == "hello"
+    group.try_dereg(pid).unwrap()
+
+def test_reg_after_stop_fwd_logs():
+    group = ProcGroup(fwd_logs=True)
+    group.stop_fwd_logs(5)
+    pid = group.reg(_track_target, "child").unwrap()
+    tracksid = group.recv(pid).unwrap()
+
+    # the child writes the track file by itself before sending the id
+    path = Path(log.err_track_dir, f"{tracksid}.log")
+    assert path.exists()
+    assert path.read_text().split()[-1] == "hello"
+    group.try_dereg(pid).unwrap()
+
+def _two_logs_target(pipe):
+    log.info("lost")
+    pipe.recv()
+    log.info("kept")
+    pipe.send(None)
+
+def test_fwd_logs_write_err(monkeypatch):
+    written = []
+
+    def write_fwd(records):
+        if not written:
+            written.append(None)
+            raise OSError("disk is full")
+        written.extend(rec[2] for rec in records)
+
+    monkeypatch.setattr(log, "write_fwd", write_fwd)
+    group = ProcGroup(fwd_logs=True)
+    pid = group.reg(_two_logs_target, "child").unwrap()
+    deadline = time.time() + 5
+    while not written and time.time() < deadline:
+        time.sleep(0.01)
+    # the listener survives the failed batch
+    group.send(pid, None).unwrap()
+    group.recv(pid).unwrap()
+    group.stop_fwd_logs(5)
+    assert written == [None, "kept"]
+    group.try_dereg(pid).unwrap()
+
+def test_fwd_logs_stop_on_collect():
+    threads = set(threading.enumerate())
+    group = ProcGroup(fwd_logs=True)
+    (thread,) = set(threading.enumerate()) - threads
+    del group
+    gc.collect()
+    thread.join(5)
+    assert not thread.is_alive()
+
+def _echo_target(pipe):
+    pipe.send(pipe.recv())
+
+def test_broadcast_gather():
+    group = ProcGroup()
+    group.reg(_echo_target, "a").unwrap()
+    group.reg(_echo_target, "b").unwrap()
+
+    assert all(r.is_ok() for r in group.broadcast("hello").values())
+    results = group.gather(5)
+    assert {k: r.unwrap() for k, r in results.items()} == {
+        "a": "hello", "b": "hello",
+    }
+
+async def test_scatter_async_gather():
+    group = ProcGroup()
+    group.reg(_echo_target, "a").unwrap()
+    group.reg(_echo_target, "b").unwrap()
+
+    group.scatter({"a": 1, "b": 2})
+    results = await group.async_gather(5, period=0.1)
+    assert {k: r.unwrap() for k, r in results.items()} == {"a": 1, "b": 2}
+
+def test_gather_timeout():
+    group = ProcGroup()
+    group.reg(_echo_target, "a").unwrap()
+
+    r = group.gather(0.1)["a"]
+    assert isinstance(r, Err)
+    assert r.is_(ecode.Timeout)
+    group.try_dereg_key("a").unwrap()
@@ -0,0 +1,32 @@
+from ryz.range import IntervalSet, Range
+
+
+def _pairs(s: IntervalSet) -> list[tuple[int, int]]:
+    return [(r.min, r.max) for r in s]
+
+def test_add():
+    s = IntervalSet([Range(10, 20), Range(0, 5)])
+    s.add(Range(6, 7))
+    s.add(Range(30, 40))
+    assert _pairs(s) == [(0, 7), (10, 20), (30, 40)]
+    s.add(Range(8, 31))
+    assert _pairs(s) == [(0, 40)]
+
+def test_contains():
+    s = IntervalSet([Range(0, 5), Range(10, 20)])
+    assert s.contains(0)
+    assert s.contains(15)
+    assert not s.contains(7)
+    assert not s.contains(-1)
+    assert not s.contains(21)
+    assert s.contains_many([-1, 0, 5, 6, 10, 21]) == [
+        False, True, True, False, True, False,
+    ]
+
+def test_set_ops():
+    a = IntervalSet([Range(0, 10), Range(20, 30)])
+    b = IntervalSet([Range(5, 22), Range(28, 40)])
+    assert _pairs(a.union(b)) == [(0, 40)]
+    assert _pairs(a.intersection(b)) == [(5, 10), (20, 22), (28, 30)]
+    assert _pairs(a.difference(b)) == [(0, 4), (23, 27)]
+    assert _pairs(b.difference(a)) == [(11, 19), (31, 40)]
@@ -0,0 +1,42 @@
+import io
+
+from ryz.str import StringUtils, StrSanitizer
+
+
+def test_utils():
+    assert StringUtils.has_cyrillic("hello мир")
+    assert not StringUtils.has_cyrillic("hello world")
+    assert StringUtils.remove_non_alpha("he1lo, мир!") == "helo"
+    assert StringUtils.remove_non_alnum("he1lo, мир!") == "he1lo"
+
+
+def test_sanitizer():
+    sanitizer = StrSanitizer(["alnum", "alpha"], detect_cyrillic=True)
+    assert sanitizer.sanitize("he1lo, world!") == "heloworld"
+    assert not sanitizer.stats.has_cyrillic
+    assert sanitizer.sanitize_many(["a1 b", "мир c", ""]) == ["ab", "c", ""]
+    assert sanitizer.stats.has_cyrillic
+    assert sanitizer.sanitize_many(["a\nb", "c"]) == ["ab", "c"]
+    assert sanitizer.stats.in_size == 13 + 9 + 4
+    assert sanitizer.stats.out_size == 9 + 3 + 3
+    assert sanitizer.stats.get_mb_per_sec() > 0
+
+
+def test_sanitizer_stream():
+    text = "hello, мир 42!\n" * 100
+    sanitizer = StrSanitizer(detect_cyrillic=True)
+    dst = io.BytesIO()
+    # chunks split Cyrillic chars
+    sanitizer.sanitize_file(io.BytesIO(text.encode()), dst, chunk_size=7)
+    assert dst.getvalue() == b"hello42" * 100
+    assert sanitizer.stats.has_cyrillic
+
+    sanitizer = StrSanitizer(["alpha"])
+    lines = io.StringIO(text)
+    assert "".join(sanitizer.sanitize_iter(lines)) == "hello" * 100
+
+    sanitizer = StrSanitizer(detect_cyrillic=True)
+    # the only Cyrillic char is split between chunks
+    chunks = [b"a\xd0", b"\xb0b"]
+    assert list(sanitizer.sanitize_iter(chunks)) == [b"a", b"b"]
+    assert sanitizer.stats.has_cyrillic
@@ -0,0 +1,166 @@
+import asyncio
+
+import pytest
+
+from ryz.thd import Thd
+
+
+async def test_defer():
+    calls = []
+
+    async with Thd("defer") as thd:
+        d = thd.d(lambda: calls.append(1) or 1, lambda _: None)
+        assert not d.is_done()
+        assert not calls
+    assert calls == [1]
+    assert d.get().unwrap() == 1
+
+async def test_defer_bulk():
+    deleted = []
+
+    async def delete_many(items: list[int]):
+        deleted.append(items)
+
+    async with Thd("defer", bulk_fns={"delete": delete_many}) as thd:
+        for i in range(3):
+            thd.d_bulk("delete", i)
+    assert deleted == [[0, 1, 2]]
+
+async def test_defer_max_concurrency():
+    running = 0
+    max_running = 0
+
+    async def op():
+        nonlocal running, max_running
+        running += 1
+        max_running = max(max_running, running)
+        await asyncio.sleep(0.01)
+        running -= 1
+
+    async with Thd("defer", max_concurrency=2) as thd:
+        for _ in range(5):
+            thd.d(op, lambda _: None, is_independent=True)
+    assert max_running == 2
+
+async def test_defer_rollback_on_commit_err():
+    rolled_back = []
+
+    def fail():
+        raise ValueError
+
+    with pytest.raises(ValueError):
+        async with Thd("defer") as thd:
+            thd.d(lambda: 1, rolled_back.append)
+            thd.d(fail, rolled_back.append)
+    assert rolled_back == [1]
+
+async def test_defer_not_executed_on_err():
+    calls = []
+
+    with pytest.raises(ValueError):
+        async with Thd("defer") as thd:
+            thd.d(lambda: calls.append(1), lambda _: None)
+            raise ValueError
+    assert not calls
+
+async def test_rollback_all():
+    rolled_back = []
+
+    async def rollback(val: int):
+        rolled_back.append(val)
+
+    async def op(val: int) -> int:
+        return val
+
+    with pytest.raises(ValueError):
+        async with Thd() as thd:
+            await thd.aa(op(1), rollback)
+            await thd.aa(op(2), rollback)
+            thd.a(lambda: 3, rolled_back.append)
+            raise ValueError
+    assert rolled_back == [3, 2, 1]
+
+async def test_rollback_independent():
+    rolled_back = []
+
+    async def rollback(val: int):
+        await asyncio.sleep(0.01 * val)
+        rolled_back.append(val)
+
+    with pytest.raises(ValueError):
+        async with Thd() as thd:
+            thd.a(lambda: 0, rolled_back.append)
+            for i in range(1, 3):
+                thd.a(lambda i=i: i, rollback, is_independent=True)
+            raise ValueError
+    # independent rollbacks run concurrently, so the faster one finishes
+    # first, and the dependent one waits for both
+    assert rolled_back == [1, 2, 0]
+
+async def test_rollback_err():
+    def fail(_):
+        raise ValueError
+
+    with pytest.raises(KeyError):
+        async with Thd() as thd:
+            thd.a(lambda: 1, fail)
+            thd.a(lambda: 2, fail, is_independent=True)
+            raise KeyError
+    assert thd.rollback_err is not None
+    assert "2 rollback steps failed" in str(thd.rollback_err)
+
+async def test_savepoint():
+    rolled_back = []
+
+    async with Thd() as thd:
+        thd.a(lambda: 1, rolled_back.append)
+        with pytest.raises(ValueError):
+            async with thd.savepoint():
+                thd.a(lambda: 2, rolled_back.append)
+                async with thd.savepoint():
+                    thd.a(lambda: 3, rolled_back.append)
+                raise ValueError
+        # the nested savepoint is exited cleanly, so its operation is rolled
+        # back by the outer one
+        assert rolled_back == [3, 2]
+        thd.a(lambda: 4, rolled_back.append)
+    assert rolled_back == [3, 2]
+
+async def test_savepoint_rollback_order():
+    rolled_back = []
+
+    with pytest.raises(KeyError):
+        async with Thd() as thd:
+            thd.a(lambda: 1, rolled_back.append)
+            with pytest.raises(ValueError):
+                async with thd.savepoint():
+                    thd.a(lambda: 2, rolled_back.append)
+                    thd.a(lambda: 3, rolled_back.append)
+                    raise ValueError
+            thd.a(lambda: 4, rolled_back.append)
+            raise KeyError
+    assert rolled_back == [3, 2, 4, 1]
+
+async def test_savepoint_defer():
+    calls = []
+
+    async with Thd("defer") as thd:
+        thd.d(lambda: calls.append(1), lambda _: None)
+        with pytest.raises(ValueError):
+            async with thd.savepoint():
+                thd.d(lambda: calls.append(2), lambda _: None)
+                raise ValueError
+    assert calls == [1]
+
+async def test_pick():
+    rolled_back = []
+
+    with pytest.raises(ValueError):
+        async with Thd() as thd:
+            thd.a(
+                lambda: {"id": 1},
+                rolled_back.append,
+                pick=lambda d: d["id"],
+            )
+            raise ValueError
+    assert rolled_back == [1]
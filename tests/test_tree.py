@@ -0,0 +1,94 @@
+import io
+
+from ryz.tree import ArrTree, TreeIndex, TreeNode, TreeUtils
+
+
+def _make_tree() -> TreeNode[int]:
+    return TreeNode(0, [
+        TreeNode(1, [TreeNode(3, []), TreeNode(4, [])]),
+        TreeNode(2, [TreeNode(5, [])]),
+    ])
+
+def test_arr_tree_traversals():
+    tree = ArrTree(_make_tree())
+    assert len(tree) == 6
+    assert [tree.vals[i] for i in tree.iter_pre()] == [0, 1, 3, 4, 2, 5]
+    assert [tree.vals[i] for i in tree.iter_post()] == [3, 4, 1, 5, 2, 0]
+    assert [tree.vals[i] for i in tree.iter_bfs()] == [0, 1, 2, 3, 4, 5]
+    assert list(tree.iter_paths()) == [[0, 1, 3], [0, 1, 4], [0, 2, 5]]
+
+def test_arr_tree_deep():
+    depth = 100_000
+    root = TreeNode(0, [])
+    node = root
+    for i in range(1, depth):
+        child = TreeNode(i, [])
+        node.childs.append(child)
+        node = child
+
+    tree = ArrTree(root)
+    assert next(tree.iter_post()) == depth - 1
+    assert list(tree.iter_paths()) == [list(range(depth))]
+
+async def test_reverse():
+    leaves = await TreeUtils.reverse(_make_tree())
+    assert [leaf.val for leaf in leaves] == [3, 4, 5]
+    path = []
+    node = leaves[0]
+    while node is not None:
+        path.append(node.val)
+        node = node.parent
+    assert path == [3, 1, 0]
+
+async def test_print():
+    root = _make_tree()
+    out = []
+    await TreeUtils.print(root, out.append)
+
+    f = io.StringIO()
+    ArrTree(root).write(f, lambda _: "")
+    assert out[0].count("\n") == f.getvalue().strip().count("\n") == 5
+
+    f = io.StringIO()
+    ArrTree(root).write(f)
+    assert f.getvalue() == \
+        "x 0\n\t - 1\n\t\t - 3\n\t\t - 4\n\t - 2\n\t\t - 5\n"
+
+def test_tree_index():
+    root = _make_tree()
+    n1, n2 = root.childs
+    n3, n4 = n1.childs
+    n5 = n2.childs[0]
+    index = TreeIndex(root, rebuild_threshold=2)
+
+    assert index.is_ancestor(root, n4)
+    assert index.is_ancestor(n1, n1)
+    assert not index.is_ancestor(n1, n5)
+    assert not index.is_ancestor(n4, n1)
+    assert index.get_lca(n3, n4) is n1
+    assert index.get_lca(n4, n5) is root
+    assert index.get_lca(n1, n3) is n1
+    assert [n.val for n in index.get_subtree(n1)] == [1, 3, 4]
+
+    n6 = TreeNode(6, [])
+    n7 = TreeNode(7, [])
+    index.append_leaf(n3, n6).unwrap()
+    index.append_leaf(n6, n7).unwrap()
+    assert index.count_pending() == 2
+    assert n6 in n3.childs
+    assert index.is_ancestor(n1, n7)
+    assert index.is_ancestor(n6, n7)
+    assert not index.is_ancestor(n7, n6)
+    assert not index.is_ancestor(n2, n7)
+    assert index.get_lca(n7, n4) is n1
+    assert index.get_depth(n7) == 4
+    assert [n.val for n in index.get_subtree(n1)] == [1, 3, 4, 6, 7]
+    assert [n.val for n in index.get_subtree(n6)] == [6, 7]
+
+    # exceeds the threshold
+    index.append_leaf(n5, TreeNode(8, [])).unwrap()
+    assert index.count_pending() == 0
+    assert [n.val for n in index.get_subtree(n1)] == [1, 3, 6, 7, 4]
+
+    assert index.append_leaf(TreeNode(9, []), TreeNode(10, [])).is_err()
+    assert index.append_leaf(n3, n4).is_err()